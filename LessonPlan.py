@@ -1,75 +1,293 @@
 import streamlit as st
-import google.generativeai as genai
+import gemini_client
+import json
 import os
-from dotenv import load_dotenv
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import registry
+import telemetry
+from lesson_plan_store import DB_PATH as STORE_PATH, LessonPlanStore
 
-load_dotenv()
+LESSON_PLAN_CONCURRENCY = int(os.getenv("LESSON_PLAN_CONCURRENCY", "12"))
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+SESSION_REQUIREMENTS = """The session plan should include:
+1. Learning objectives
+2. Lesson activities and descriptions
+3. Teaching strategies to increase student engagement
+4. Assessment methods
+5. Estimated time for each section
+6. A reference URL from YouTube for the topic of this session
+7. Cross-verify the URLs being provided by you to ensure they are valid and working
+
+Provide a relevant and engaging YouTube video that aligns with the topic and learning objectives. Ensure that the video is of high quality, up-to-date, and appropriate for the target audience.
+
+After writing the session plan, please double-check the YouTube URL to confirm it is working and accessible. If it is broken or unavailable, replace it with an alternative working link that covers the same topic.
 
-genai.configure(api_key=GEMINI_API_KEY)
+The session plan should be well-structured and easy to follow."""
 
-def generate_lesson_plan(unit_details, session_duration, num_sessions):
+
+def generate_outline(unit_details, session_duration, num_sessions):
+    """
+    One short request that splits the unit into sessions, so the detailed
+    sessions can then be written in parallel without overlapping.
+    Returns a list of {"title", "focus"} dicts, one per session.
+    """
     prompt = f"""
 Unit Details:
 {unit_details}
 
-Session Duration: {session_duration} hours
-Number of Sessions: {num_sessions}
+Split this unit into exactly {num_sessions} teaching sessions of {session_duration} hours each, in teaching order.
+Respond with a JSON array only, one element per session:
+{{"title": "short session title", "focus": "one sentence on what the session covers"}}
+"""
+    outline = []
+    try:
+        items = json.loads(gemini_client.generate(prompt, policy="fast", generation_config=gemini_client.JSON_GENERATION_CONFIG))
+        for item in items if isinstance(items, list) else []:
+            if isinstance(item, dict) and isinstance(item.get("title"), str) and item["title"].strip():
+                outline.append({"title": item["title"].strip(), "focus": str(item.get("focus", "")).strip()})
+    except ValueError:
+        # not JSON; the sessions are still planned from the unit details alone
+        pass
+    outline = outline[:num_sessions]
+    for number in range(len(outline) + 1, num_sessions + 1):
+        outline.append({"title": f"Session {number}", "focus": ""})
+    return outline
 
-The lesson plan should include:
-1. Learning objectives
-2. Lesson activities and descriptions
-3. Teaching strategies to increase student engagement
-4. Assessment methods
-5. Estimated time for each section
-6. A reference URL from YouTube for the topic of that specific session
-7. Cross-verify the URLs being provided by you to ensure they are valid and working
 
-For each session, provide a relevant and engaging YouTube video that aligns with the topic and learning objectives. Ensure that the video is of high quality, up-to-date, and appropriate for the target audience.
+def format_hours(hours):
+    return f"{hours:g} hour" + ("" if hours == 1 else "s")
+
+
+def format_outline(outline):
+    return "\n".join(
+        f"{number}. {session['title']}"
+        + (f" ({format_hours(session['duration'])})" if "duration" in session else "")
+        + (f" - {session['focus']}" if session['focus'] else "")
+        for number, session in enumerate(outline, start=1)
+    )
+
+
+def generate_session(unit_details, session_duration, outline, index):
+    """The detailed plan of one session, written with the whole outline as context."""
+    session = outline[index]
+    prompt = f"""
+Unit Details:
+{unit_details}
+
+The unit is taught in {len(outline)} sessions of {format_hours(session_duration)} each:
+{format_outline(outline)}
 
-After generating the lesson plan, please double-check all the YouTube URLs to confirm they are working and accessible. If any URLs are broken or unavailable, replace them with alternative working links that cover the same topic.
+Write the detailed plan for session {index + 1} only: "{session['title']}". {session['focus']}
+This session lasts {format_hours(session.get('duration', session_duration))}.
+Do not repeat material that belongs to the other sessions.
 
-The lesson plan should be well-structured, easy to follow, and include engaging and relevant YouTube resources to enhance the learning experience.
+{SESSION_REQUIREMENTS}
 """
+    return gemini_client.generate(prompt, policy="quality")
 
-    try:
-        model = genai.GenerativeModel("gemini-1.5-pro")
-        response = model.generate_content(prompt)
-        return response.text.strip()
-    except Exception:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        return response.text.strip()
+
+def generate_lesson_plan(unit_details, session_duration, num_sessions, concurrency=LESSON_PLAN_CONCURRENCY,
+                         on_outline=lambda outline: None, on_session=lambda index, session, text: None):
+    """
+    Plan the unit as an outline, then write every session concurrently.
+    `on_session` is called from this thread as each session finishes, in
+    completion order. Returns the outline and the session texts in order.
+    """
+    outline = generate_outline(unit_details, session_duration, num_sessions)
+    on_outline(outline)
+    sessions = [None] * len(outline)
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(outline)))) as pool:
+        futures = {
+            pool.submit(telemetry.bind(generate_session), unit_details, session_duration, outline, index): index
+            for index in range(len(outline))
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                sessions[index] = future.result()
+            except Exception as e:
+                sessions[index] = f"Could not generate this session: {e}"
+            on_session(index, outline[index], sessions[index])
+    return outline, sessions
+
+
+def format_session(number, session, text):
+    return f"### Session {number}: {session['title']}\n\n{text}"
+
+
+def shared_store():
+    """Process-wide lesson plan store, shared by all sessions."""
+    return registry.get(("lesson_plans", STORE_PATH), LessonPlanStore)
+
+
+def save_lesson_plan(unit_details, session_duration, outline, sessions, store=None):
+    """Store a generated plan one session per row. Returns its id."""
+    store = store or shared_store()
+    return store.create(unit_details, session_duration, [
+        {**session, "duration": session_duration, "content": text} for session, text in zip(outline, sessions)
+    ])
+
+
+def plan_outline(plan):
+    return [
+        {"title": session["title"], "focus": session["focus"], "duration": session["duration"]}
+        for session in plan["sessions"]
+    ]
+
+
+def regenerate_session(plan, index, store=None):
+    """Write a new version of one stored session; every other session is kept as it is."""
+    store = store or shared_store()
+    outline = plan_outline(plan)
+    text = generate_session(plan["unit_details"], plan["session_duration"], outline, index)
+    store.update_session(plan["id"], index, content=text, base_content=text, base_duration=outline[index]["duration"])
+    return text
+
+
+def resize_session(plan, index, hours, store=None):
+    """
+    Adapt one stored session to a new duration by rewriting the text it was
+    written with, which is quicker than writing it again. Going back to that
+    duration restores the text, and the rewrite for each duration is cached,
+    so undoing or repeating a change does not call the model again.
+    """
+    store = store or shared_store()
+    session = plan["sessions"][index]
+    if hours == session["base_duration"]:
+        text = session["base_content"]
+    else:
+        change = "Extend" if hours > session["base_duration"] else "Condense"
+        prompt = f"""
+Unit Details:
+{plan['unit_details']}
+
+Below is the plan for session {index + 1} of this unit, "{session['title']}", written for {format_hours(session['base_duration'])}.
+{change} it so that it fits {format_hours(hours)}: adjust the activities and the estimated time of each section, keep the learning objectives and the YouTube reference, and keep the same structure.
+Respond with the revised session plan only.
+
+{session['base_content']}
+"""
+        text = gemini_client.generate(prompt, policy="fast", cache_namespace="lessonplan.resize")
+    store.update_session(plan["id"], index, duration=hours, content=text)
+    return text
+
+
+def insert_session(plan, index, title, focus="", hours=None, store=None):
+    """Add a session before `index` and write only that session."""
+    store = store or shared_store()
+    hours = hours or plan["session_duration"]
+    outline = plan_outline(plan)
+    outline.insert(index, {"title": title, "focus": focus, "duration": hours})
+    text = generate_session(plan["unit_details"], plan["session_duration"], outline, index)
+    store.insert_session(plan["id"], index, {**outline[index], "content": text})
+    return text
 
 def get_motivational_content():
     prompt = "Give a motivational quote for a teacher who is nervous for a presentation"
 
-    try:
-        model = genai.GenerativeModel("gemini-1.5-pro")
-        response = model.generate_content(prompt)
-        return response.text.strip()
-    except Exception:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        return response.text.strip()
+    return gemini_client.generate(prompt, policy="fast")
+
+def _plan_label(row):
+    _, unit_details, sessions, updated = row
+    title = " ".join(unit_details.split())[:60] or "Untitled unit"
+    return f"{title} ({sessions} sessions, edited {time.strftime('%d %b %Y %H:%M', time.localtime(updated))})"
+
+
+def show_saved_plan(plan, store):
+    """A stored plan with actions that change one session at a time."""
+    st.header("Lesson Plan")
+    sessions = plan["sessions"]
+    for index, session in enumerate(sessions):
+        with st.expander(f"Session {index + 1}: {session['title']} ({format_hours(session['duration'])})",
+                         expanded=True):
+            st.markdown(session["content"])
+            col1, col2, col3 = st.columns([1, 1, 1])
+            hours = col2.number_input("Duration (hours):", min_value=0.5, step=0.5, value=float(session["duration"]),
+                                      key=f"hours_{plan['id']}_{index}")
+            if col1.button("Regenerate session", key=f"regenerate_{plan['id']}_{index}"):
+                with st.spinner(f"Rewriting session {index + 1}..."):
+                    regenerate_session(plan, index, store)
+                st.rerun()
+            if col3.button("Apply duration", key=f"resize_{plan['id']}_{index}", disabled=hours == session["duration"]):
+                with st.spinner(f"Adapting session {index + 1} to {format_hours(hours)}..."):
+                    resize_session(plan, index, hours, store)
+                st.rerun()
+
+    st.subheader("Insert a session")
+    positions = [f"Before session {number}" for number in range(1, len(sessions) + 1)] + ["At the end"]
+    position = st.selectbox("Position:", range(len(positions)), index=len(sessions),
+                            format_func=lambda i: positions[i], key=f"insert_at_{plan['id']}")
+    title = st.text_input("Session title:", key=f"insert_title_{plan['id']}")
+    focus = st.text_input("What the session should cover (optional):", key=f"insert_focus_{plan['id']}")
+    if st.button("Insert Session", key=f"insert_{plan['id']}"):
+        if title.strip():
+            with st.spinner("Writing the new session..."):
+                insert_session(plan, position, title.strip(), focus.strip(), store=store)
+            st.rerun()
+        else:
+            st.warning("Please give the new session a title.")
+
 
 def lessonplan():
     st.title("AI-Powered Lesson Planner")
+    store = shared_store()
     unit_details = st.text_area("Provide details about the unit you want to teach:", height=200)
     session_duration = st.number_input("Enter the duration of each session (in hours):", min_value=1, step=1)
     num_sessions = st.number_input("Enter the number of sessions to complete the topic:", min_value=1, step=1)
 
     if st.button("Generate Lesson Plan"):
         if unit_details and session_duration and num_sessions:
-            with st.spinner("Generating lesson plan..."):
-                lesson_plan = generate_lesson_plan(unit_details, session_duration, num_sessions)
-                st.header("Lesson Plan")
-                st.write(lesson_plan)
-                motivation = get_motivational_content()
-                st.success(motivation)
+            live = st.empty()
+            slots = []
+
+            def show_outline(outline):
+                # One slot per session, filled in place as each session finishes
+                with live.container():
+                    st.header("Lesson Plan")
+                    for number, session in enumerate(outline, start=1):
+                        slot = st.empty()
+                        slot.info(f"Session {number}: {session['title']} - writing...")
+                        slots.append(slot)
+
+            def show_session(index, session, text):
+                slots[index].markdown(format_session(index + 1, session, text))
+
+            with st.spinner("Generating lesson plan..."), ThreadPoolExecutor(max_workers=1) as quote_pool:
+                # The quote does not depend on the plan, so it is fetched alongside it
+                motivation = quote_pool.submit(telemetry.bind(get_motivational_content))
+                outline, sessions = generate_lesson_plan(
+                    unit_details, int(session_duration), int(num_sessions),
+                    on_outline=show_outline, on_session=show_session
+                )
+            st.session_state['lesson_plan_id'] = save_lesson_plan(
+                unit_details, int(session_duration), outline, sessions, store
+            )
+            # The saved plan below replaces the live view
+            live.empty()
+            try:
+                st.success(motivation.result())
+            except Exception as e:
+                st.warning(f"Could not fetch a motivational quote: {e}")
         else:
             st.warning("Please provide all the required information.")
 
+    recent = store.recent()
+    if recent:
+        labels = {row[0]: _plan_label(row) for row in recent}
+        current = st.session_state.get('lesson_plan_id')
+        options = [None] + list(labels)
+        chosen = st.selectbox(
+            "Open a saved lesson plan:", options, index=options.index(current) if current in labels else 0,
+            format_func=lambda plan_id: "-" if plan_id is None else labels[plan_id]
+        )
+        st.session_state['lesson_plan_id'] = chosen
+
+    plan_id = st.session_state.get('lesson_plan_id')
+    plan = store.get(plan_id) if plan_id else None
+    if plan is not None:
+        show_saved_plan(plan, store)
+
+
 if __name__ == "__main__":
     lessonplan()
@@ -1,24 +1,46 @@
 import streamlit as st
-import google.generativeai as genai
+import gemini_client
+import os
+import queue
 import re
-from docx import Document
-from docx.enum.text import WD_ALIGN_PARAGRAPH
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-import os
-from dotenv import load_dotenv
+import registry
+import telemetry
+from question_bank import DB_PATH as BANK_PATH, QuestionBank
+from quiz_dedupe import Deduplicator
+from quiz_format import JSON_FORMAT, QuizStreamParser, format_quiz, parse_quiz_json
+from quiz_variants import export_variants_zip, quiz_document, quiz_template
+from reports import DOCX_MIME
 
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+MAX_QUESTIONS = 100
+MAX_VARIANTS = 26
+# Larger quizzes are split into concurrent requests of at most this many questions
+QUIZ_BATCH_SIZE = 10
+QUIZ_CONCURRENCY = int(os.getenv("QUIZ_CONCURRENCY", "10"))
+# One angle per batch so that concurrent batches ask different questions
+SUBTOPIC_HINTS = [
+    "definitions and key terms",
+    "core concepts and principles",
+    "real-world applications and examples",
+    "causes, effects and relationships",
+    "comparisons and classifications",
+    "processes, sequences and stages",
+    "numerical problems and interpreting data",
+    "history, discoveries and notable people",
+    "common misconceptions",
+    "analysing scenarios and predicting outcomes",
+]
 
-genai.configure(api_key=GEMINI_API_KEY)
 
-def generate_mcq_questions(topic, difficulty, num_questions):
-    prompt = f"""
+def quiz_prompt(topic, difficulty, num_questions, focus=None):
+    focus_line = f'\n    - Focus only on this aspect of the topic: "{focus}"' if focus else ""
+    return f"""
     Generate a multiple-choice quiz with the following specifications:
     - Topic: "{topic}"
     - Difficulty level: "{difficulty}"
-    - Number of questions: {num_questions}
-    - Each question should have 4 options labeled a, b, c, and d.
+    - Number of questions: {num_questions}{focus_line}
+    - Each question should have 4 options.
     - Each option should be brief (2-3 words).
     - Clearly specify the correct answer for each question.
 
@@ -28,64 +50,148 @@ def generate_mcq_questions(topic, difficulty, num_questions):
     3. Appropriately challenging for the specified difficulty level.
     4. No code-related questions.
 
-    Example format:
-    Q1: What is the capital of France?
-    a. Berlin
-    b. Madrid
-    c. Paris
-    d. Rome
-    Answer: c
+    {JSON_FORMAT}
+
+    Example element:
+    {{"question": "What is the capital of France?", "options": ["Berlin", "Madrid", "Paris", "Rome"], "answer": "c"}}
+    """
+
+
+def repair_questions(broken, topic, difficulty):
+    """Ask once for corrected versions of items that failed validation; returns the ones that now pass."""
+    items = "\n".join(f"- {raw.strip()}" for raw in broken)
+    prompt = f"""
+    These multiple-choice questions about "{topic}" ({difficulty}) are malformed: invalid JSON,
+    missing options, or an answer that is not one of the options. Return corrected versions,
+    one per item, keeping each question's meaning. If an item cannot be saved, replace it with
+    a new question on the same topic.
+
+    {JSON_FORMAT}
+
+    Items:
+    {items}
+    """
+    questions, _ = parse_quiz_json(gemini_client.generate(prompt, policy="fast", generation_config=gemini_client.JSON_GENERATION_CONFIG))
+    return questions[:len(broken)]
+
+
+def stream_mcq_questions(topic, difficulty, num_questions, focus=None):
+    """
+    Stream a quiz in JSON mode and yield each question as soon as its closing
+    brace arrives. Items that fail validation are re-requested together at the
+    end instead of repeating the whole quiz.
+    """
+    parser = QuizStreamParser()
+    stream = gemini_client.stream(
+        quiz_prompt(topic, difficulty, num_questions, focus), policy="fast", generation_config=gemini_client.JSON_GENERATION_CONFIG
+    )
+    for chunk in stream:
+        for lines, _ in parser.feed(chunk):
+            if lines is not None:
+                yield lines
+    yield from parser.close()
+    if parser.broken:
+        with telemetry.span("quiz.repair", items=len(parser.broken)) as tags:
+            repaired = repair_questions(parser.broken, topic, difficulty)
+            tags["repaired"] = len(repaired)
+        yield from repaired
+
+
+def batch_sizes(num_questions, batch_size=QUIZ_BATCH_SIZE):
+    """Split a quiz into near-equal batches of at most `batch_size` questions."""
+    batches = -(-num_questions // batch_size)
+    base, extra = divmod(num_questions, batches)
+    return [base + 1 if i < extra else base for i in range(batches)]
+
+
+def _renumber(question, number):
+    return [re.sub(r"^Q\d+: ", f"Q{number}: ", question[0])] + question[1:]
+
+
+def shared_bank():
+    """Process-wide question bank, shared by all sessions."""
+    return registry.get(("question_bank", BANK_PATH), QuestionBank)
 
-    Quiz:
+
+def generate_quiz(topic, difficulty, num_questions, concurrency=QUIZ_CONCURRENCY, on_batch=lambda questions: None, bank=None):
+    """
+    Build a quiz from the question bank first, then generate only the shortfall
+    in concurrent streamed batches, each focused on a different subtopic. Every
+    parsed question is added to the bank as it arrives. Questions that repeat an
+    earlier one are dropped and the remaining shortfall is asked for once more.
+    `on_batch` receives the new, renumbered questions as soon as they are available.
+    Returns the questions in the order they were shown and how many came from the bank.
     """
+    dedupe = Deduplicator()
+    quiz = []
+    errors = []
+
+    def accept(questions):
+        fresh = []
+        for question in questions:
+            if len(quiz) + len(fresh) < num_questions and dedupe.add(question[0]):
+                fresh.append(_renumber(question, len(quiz) + len(fresh) + 1))
+        quiz.extend(fresh)
+        if fresh:
+            on_batch(fresh)
+
+    def accept_generated(questions):
+        if bank is not None:
+            bank.add(topic, difficulty, questions)
+        accept(questions)
+
+    if bank is not None:
+        accept(bank.draw(topic, difficulty, num_questions))
+    from_bank = len(quiz)
+    needed = num_questions - from_bank
+    if needed == 0:
+        return quiz, from_bank
+
+    # Workers stream questions into the queue; this thread shows and stores them
+    arrived = queue.Queue()
+
+    def produce(size, focus):
+        for question in stream_mcq_questions(topic, difficulty, size, focus):
+            arrived.put(question)
+
+    sizes = batch_sizes(needed)
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(sizes)))) as pool:
+        pending = {
+            pool.submit(telemetry.bind(produce), size, SUBTOPIC_HINTS[i % len(SUBTOPIC_HINTS)] if len(sizes) > 1 else None)
+            for i, size in enumerate(sizes)
+        }
+        while pending or not arrived.empty():
+            try:
+                accept_generated([arrived.get(timeout=0.05)])
+            except queue.Empty:
+                pass
+            for future in [f for f in pending if f.done()]:
+                pending.discard(future)
+                if future.exception() is not None:
+                    errors.append(future.exception())
+
+    shortfall = num_questions - len(quiz)
+    if shortfall > 0:
+        try:
+            for question in stream_mcq_questions(topic, difficulty, shortfall, "aspects not covered by the usual textbook questions"):
+                accept_generated([question])
+        except Exception as e:
+            errors.append(e)
+    if not quiz and errors:
+        raise errors[0]
+    return quiz, from_bank
 
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    response = model.generate_content(prompt)
-    return response.text.strip()
-
-def format_quiz(quiz):
-    lines = quiz.split("\n")
-    formatted_quiz = []
-    current_question = []
-
-    for line in lines:
-        if re.match(r"^Q\d+: ", line):
-            if current_question:
-                formatted_quiz.append(current_question)
-            current_question = [line]
-        elif re.match(r"^[a-d]\. ", line):
-            current_question.append(line)
-        elif re.match(r"^Answer: ", line):
-            current_question.append(line)
-    if current_question:
-        formatted_quiz.append(current_question)
-    return formatted_quiz
 
 def generate_docx(quiz, heading1, heading2):
-    doc = Document()
-    
-    heading1_paragraph = doc.add_heading(heading1, level=0)
-    heading1_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    heading2_paragraph = doc.add_heading(heading2, level=2)
-    heading2_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    doc.add_paragraph("Name:")
-    doc.add_paragraph("Roll number:")
-    doc.add_paragraph("Class:")
-    doc.add_paragraph("Section:")
-    doc.add_paragraph("")  # Add space
-
-    for question in quiz:
-        for line in question:
-            if not re.match(r"^Answer: ", line):
-                doc.add_paragraph(line)
-        doc.add_paragraph("")
-
-    doc_io = BytesIO()
-    doc.save(doc_io)
-    doc_io.seek(0)
-    return doc_io
+    return BytesIO(quiz_document(quiz_template(heading1, heading2), quiz))
+
+def show_question(question):
+    st.write(question[0])
+    for line in question[1:]:
+        if "Answer: " in line:
+            st.write(f"**Correct answer:** {line.split(': ')[1]}")
+        else:
+            st.write(line)
 
 def MCQ():
     st.title("MCQ Quiz Generator")
@@ -94,39 +200,85 @@ def MCQ():
     quiz_title = st.text_input("Enter the quiz title:")
     topic = st.text_input("Enter the topic:")
     difficulty = st.selectbox("Select difficulty:", ["Beginner", "Intermediate", "Expert"])
-    num_questions = st.number_input("Number of questions:", min_value=1, max_value=20, value=5)
+    num_questions = st.number_input("Number of questions:", min_value=1, max_value=MAX_QUESTIONS, value=5)
+    use_bank = st.checkbox("Reuse questions from the question bank", value=True,
+                           help="Serve previously generated questions for this topic and difficulty; only the rest is generated.")
 
     if st.button("Generate Quiz"):
         if topic:
             with st.spinner("Generating questions using Gemini..."):
-                quiz = generate_mcq_questions(topic, difficulty, num_questions)
-                formatted_quiz = format_quiz(quiz)
                 st.subheader("Generated Quiz:")
                 if institute_name:
                     st.write(f"**{institute_name}**")
                 if quiz_title:
                     st.write(f"**{quiz_title}**")
-                
+
+                # Show each question as it arrives; replaced by the full quiz below once done
+                live = st.empty()
+                arrivals = live.container()
+
+                def show_batch(questions):
+                    with arrivals:
+                        for question in questions:
+                            show_question(question)
+
+                try:
+                    formatted_quiz, from_bank = generate_quiz(
+                        topic, difficulty, int(num_questions), on_batch=show_batch,
+                        bank=shared_bank() if use_bank else None
+                    )
+                except Exception as e:
+                    st.error(f"Error generating quiz: {e}")
+                    return
+                live.empty()
+                if use_bank:
+                    st.caption(f"{from_bank} questions from the question bank, "
+                               f"{len(formatted_quiz) - from_bank} newly generated.")
+                if len(formatted_quiz) < num_questions:
+                    st.warning(f"Only {len(formatted_quiz)} distinct questions could be generated.")
+
                 st.session_state['quiz'] = formatted_quiz
-                st.session_state['docx_content'] = generate_docx(formatted_quiz, institute_name, quiz_title)
+                # Documents are built on request, from the quiz now in the session
+                st.session_state.pop('docx_content', None)
+                st.session_state.pop('variants_zip', None)
         else:
             st.error("Please enter a topic.")
 
     if 'quiz' in st.session_state:
         for question in st.session_state['quiz']:
-            st.write(question[0])
-            for line in question[1:]:
-                if "Answer: " in line:
-                    st.write(f"**Correct answer:** {line.split(': ')[1]}")
-                else:
-                    st.write(line)
+            show_question(question)
+
+        if st.button("Prepare Quiz DOCX"):
+            st.session_state['docx_content'] = generate_docx(st.session_state['quiz'], institute_name, quiz_title)
 
         if 'docx_content' in st.session_state:
             st.download_button(
                 label="Download Quiz as DOCX",
                 data=st.session_state['docx_content'],
                 file_name=f"{topic} quiz.docx",
-                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                mime=DOCX_MIME
+            )
+
+        st.subheader("Exam Variants")
+        num_variants = st.number_input("Shuffled variants per section:", min_value=1, max_value=MAX_VARIANTS, value=4)
+        sections = st.text_input("Sections (comma-separated, optional):")
+        if st.button("Build Variants and Answer Keys"):
+            section_names = [name.strip() for name in sections.split(",") if name.strip()] or [""]
+            progress = st.progress(0.0, text="Building variants...")
+            st.session_state['variants_zip'] = export_variants_zip(
+                st.session_state['quiz'], institute_name, quiz_title, int(num_variants), section_names,
+                on_done=lambda done, total: progress.progress(done / total, text=f"Built {done} of {total} variants")
+            )
+            progress.empty()
+
+        if 'variants_zip' in st.session_state:
+            archive = st.session_state['variants_zip']
+            archive.seek(0)
+            st.download_button(
+                label="Download Variants and Answer Keys (ZIP)",
+                data=archive.read(),
+                file_name=f"{topic} quiz variants.zip",
+                mime="application/zip"
             )
 
 if __name__ == "__main__":
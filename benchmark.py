@@ -0,0 +1,297 @@
+"""
+Offline benchmarks of EduEase's hot paths.
+
+Gemini and the embedding APIs are replaced with deterministic local stand-ins,
+so no API key or network is needed. Results are written as JSON; pass an
+earlier result file with --compare to flag regressions.
+
+    python benchmark.py --rows 100,10000,1000000 --latency-ms 50 --output bench.json
+    python benchmark.py --compare bench.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+# Must be set before the app modules read their configuration
+os.environ.setdefault("EDUEASE_FAKE_GEMINI", "1")
+os.environ.setdefault("EDUEASE_FAKE_EMBEDDINGS", "1")
+os.environ.setdefault("EDUEASE_TELEMETRY", "0")
+os.environ.setdefault("EDUEASE_CACHE_DIR", tempfile.mkdtemp(prefix="eduease-bench-"))
+
+import numpy as np
+import pandas as pd
+
+SUBJECTS = ['Maths', 'Geography', 'Physics', 'English', 'History']
+NAMES = ['John', 'Ravi', 'Ramesh', 'Rohit', 'Vijay', 'Imran', 'Charlie', 'Ananya', 'Aarav', 'Zara',
+         'iqra', 'ankita', 'lavanya', 'joseph', 'michael', 'ahmed', 'isabella', 'priya', 'sunita', 'tarun']
+DEFAULT_ROWS = "100,10000,100000,1000000"
+DEFAULT_PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "01_Previous_Sem_Lecture_01-02-03.pdf")
+BENCHMARKS = ["quiz", "analysis", "charts", "pdf", "retrieval"]
+
+
+def synthetic_class(rows, seed=0):
+    """A class dataset shaped like dataset_for_hackprix.csv with `rows` students."""
+    rng = np.random.default_rng(seed)
+    data = {
+        'Roll No': np.arange(1, rows + 1),
+        'Name': [f"{NAMES[i % len(NAMES)]} {i // len(NAMES)}" for i in range(rows)],
+    }
+    for subject in SUBJECTS:
+        data[subject] = np.clip(rng.normal(62, 12, rows), 0, 100).round().astype(int)
+    data['Attendance'] = np.clip(rng.normal(78, 10, rows), 0, 100).round().astype(int)
+    return pd.DataFrame(data)
+
+
+def write_synthetic_csv(path, rows, seed=0):
+    synthetic_class(rows, seed).to_csv(path, index=False, encoding='utf-8-sig')
+    return path
+
+
+def synthetic_quiz(num_questions):
+    """Quiz text in the plain Q1:/a./Answer: layout."""
+    lines = []
+    for i in range(1, num_questions + 1):
+        lines += [f"Q{i}: Which option is correct for question {i}?",
+                  "a. First", "b. Second", "c. Third", "d. Fourth",
+                  f"Answer: {'abcd'[i % 4]}", ""]
+    return "\n".join(lines)
+
+
+def synthetic_quiz_json(num_questions, variant=""):
+    """Quiz reply in the JSON format the MCQ prompt asks Gemini for."""
+    return json.dumps([
+        {"question": f"Which option is correct for question {i} {variant}?",
+         "options": ["First", "Second", "Third", "Fourth"], "answer": "abcd"[i % 4]}
+        for i in range(1, num_questions + 1)
+    ])
+
+
+def quiz_responder(model_name, prompt):
+    match = next((line for line in prompt.splitlines() if "Number of questions:" in line), "")
+    num_questions = int(match.rsplit(":", 1)[-1].strip() or 5) if match else 5
+    # distinct questions per prompt, so concurrent batches are not deduplicated away
+    return synthetic_quiz_json(num_questions, hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8])
+
+
+def measure(fn, repeat):
+    """Seconds per call over `repeat` calls, after one untimed warm-up call."""
+    fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {
+        "runs": repeat,
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        "mean_s": statistics.fmean(times),
+    }
+
+
+def bench_quiz(args, results):
+    import gemini_client
+    from MCQ import format_quiz, generate_docx, generate_quiz
+    from quiz_format import parse_quiz_json
+    from quiz_variants import make_variants
+
+    gemini_client.set_backend(gemini_client.FakeBackend(latency=args.latency_ms / 1000, responder=quiz_responder))
+    for questions in (5, 20, 100):
+        text = synthetic_quiz(questions)
+        reply = synthetic_quiz_json(questions)
+        quiz = format_quiz(text)
+        params = {"questions": questions}
+        results.append({"name": "format_quiz", "params": params, **measure(lambda: format_quiz(text), args.repeat)})
+        results.append({"name": "parse_quiz_json", "params": params, **measure(lambda: parse_quiz_json(reply), args.repeat)})
+        results.append({"name": "generate_docx", "params": params, **measure(lambda: generate_docx(quiz, "Institute", "Quiz"), args.repeat)})
+        results.append({"name": "make_variants", "params": {**params, "variants": 4},
+                        **measure(lambda: make_variants(quiz, 4), args.repeat)})
+        results.append({
+            "name": "generate_quiz",
+            "params": {**params, "latency_ms": args.latency_ms},
+            **measure(lambda: generate_quiz("Photosynthesis", "Beginner", questions), args.repeat),
+        })
+
+
+def bench_analysis(args, results, workdir):
+    from cohort_stats import CohortStats
+    from dataset_io import read_dataset
+    from teacheranalysis import attendance_insights
+
+    for rows in args.rows:
+        path = write_synthetic_csv(os.path.join(workdir, f"class_{rows}.csv"), rows)
+        params = {"rows": rows}
+        results.append({"name": "read_dataset", "params": params, **measure(lambda: read_dataset(path, path), args.repeat)})
+        df, _ = read_dataset(path, path)
+        results.append({"name": "attendance_insights", "params": params, **measure(lambda: attendance_insights(df), args.repeat)})
+        results.append({"name": "CohortStats", "params": params, **measure(lambda: CohortStats(df, SUBJECTS), args.repeat)})
+
+
+def bench_charts(args, results):
+    from chart_cache import ChartCache, figure_to_png
+    from reports import plot_attendance, plot_performance
+
+    marks = [62, 71, 55, 80, 47]
+    results.append({"name": "plot_performance", "params": {},
+                    **measure(lambda: figure_to_png(plot_performance(SUBJECTS, marks, "Class Average")), args.repeat)})
+    attendance = synthetic_class(10_000)['Attendance']
+    results.append({"name": "plot_attendance", "params": {"rows": len(attendance)},
+                    **measure(lambda: figure_to_png(plot_attendance(attendance)), args.repeat)})
+    cache = ChartCache()
+    results.append({"name": "chart_cache_hit", "params": {},
+                    **measure(lambda: cache.get_or_render("performance", lambda: plot_performance(SUBJECTS, marks, "Class Average")), args.repeat)})
+
+
+def _splitter():
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from lessonsummarize import CHUNK_OVERLAP, CHUNK_SIZE
+    return RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+
+
+def bench_pdf(args, results):
+    import pdf_ingest
+
+    with open(args.pdf, "rb") as f:
+        data = f.read()
+    splitter = _splitter()
+
+    def split():
+        return sum(1 for _ in pdf_ingest.iter_chunks(pdf_ingest.iter_pages(BytesIO(data), args.pdf), splitter))
+
+    results.append({"name": "pdf_split", "params": {"pdf": os.path.basename(args.pdf), "chunks": split()},
+                    **measure(split, args.repeat)})
+
+
+def bench_retrieval(args, results):
+    import pdf_ingest
+    from embedding_scheduler import EmbeddingScheduler, FakeEmbeddings
+    from langchain.vectorstores import Chroma
+    from lessonsummarize import SUMMARY_QUERY
+
+    with open(args.pdf, "rb") as f:
+        data = f.read()
+    embedding = EmbeddingScheduler(FakeEmbeddings(dimensions=768, latency=args.latency_ms / 1000))
+    splitter = _splitter()
+    runs = {"n": 0}
+
+    def ingest():
+        runs["n"] += 1
+        vectordb = Chroma(collection_name=f"benchmark_{runs['n']}", embedding_function=embedding)
+        chunks, _ = pdf_ingest.ingest(BytesIO(data), args.pdf, vectordb, splitter,
+                                      batch_size=embedding.batch_size * embedding.max_in_flight)
+        return vectordb, chunks
+
+    params = {"pdf": os.path.basename(args.pdf), "latency_ms": args.latency_ms}
+    results.append({"name": "pdf_ingest", "params": params, **measure(ingest, args.repeat)})
+    vectordb, chunks = ingest()
+    results.append({"name": "similarity_search", "params": {**params, "chunks": chunks},
+                    **measure(lambda: vectordb.similarity_search(SUMMARY_QUERY), args.repeat)})
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(args):
+    results = []
+    errors = {}
+    with tempfile.TemporaryDirectory(prefix="eduease-bench-data-") as workdir:
+        suites = {
+            "quiz": lambda: bench_quiz(args, results),
+            "analysis": lambda: bench_analysis(args, results, workdir),
+            "charts": lambda: bench_charts(args, results),
+            "pdf": lambda: bench_pdf(args, results),
+            "retrieval": lambda: bench_retrieval(args, results),
+        }
+        for name in args.only:
+            print(f"running {name}...", file=sys.stderr)
+            try:
+                suites[name]()
+            except ImportError as e:
+                # a suite whose dependencies are not installed is reported, not fatal
+                errors[name] = str(e)
+    return {
+        "meta": {
+            "timestamp": time.time(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "latency_ms": args.latency_ms,
+            "repeat": args.repeat,
+        },
+        "results": results,
+        "skipped": errors,
+    }
+
+
+def _result_key(result):
+    return result["name"], json.dumps(result["params"], sort_keys=True)
+
+
+def compare(baseline, current, threshold):
+    """Print the median time of each benchmark against the baseline. Returns the regressions."""
+    before = {_result_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = before.get(_result_key(result))
+        if old is None or not old["median_s"]:
+            continue
+        ratio = result["median_s"] / old["median_s"]
+        flag = "REGRESSION" if ratio > threshold else ""
+        print(f"{result['name']:<28} {_result_key(result)[1]:<40} {old['median_s'] * 1000:10.2f} ms "
+              f"-> {result['median_s'] * 1000:10.2f} ms  x{ratio:5.2f} {flag}", file=sys.stderr)
+        if flag:
+            regressions.append(result)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default=DEFAULT_ROWS, help="comma-separated class sizes for the dataset benchmarks")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated latency of each Gemini/embedding call")
+    parser.add_argument("--pdf", default=DEFAULT_PDF, help="lesson PDF used for the splitting and retrieval benchmarks")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help=f"comma-separated subset of {','.join(BENCHMARKS)}")
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+    args.rows = [int(rows) for rows in args.rows.split(",") if rows]
+    args.only = [name for name in args.only.split(",") if name]
+    unknown = set(args.only) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    report = run(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+    for name, error in report["skipped"].items():
+        print(f"skipped {name}: {error}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(baseline, report, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+import telemetry
+
+CHART_CACHE_MAX_MB = float(os.getenv("CHART_CACHE_MAX_MB", "64"))
+
+
+def chart_key(kind, *parts):
+    """Hash of a chart's kind, plotted data and styling."""
+    digest = hashlib.sha256(kind.encode("utf-8"))
+    for part in parts:
+        if isinstance(part, (list, tuple)) and not any(isinstance(item, str) for item in part):
+            part = np.asarray(part)
+        if hasattr(part, "to_numpy"):
+            part = part.to_numpy()
+        if isinstance(part, np.ndarray) and part.dtype != object:
+            digest.update(f"{part.dtype}{part.shape}".encode("utf-8"))
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(repr(part).encode("utf-8"))
+        digest.update(b"|")
+    return digest.hexdigest()
+
+
+def figure_to_png(fig):
+    """Render a figure to PNG bytes and release it from pyplot's registry."""
+    try:
+        buffer = BytesIO()
+        fig.savefig(buffer, format="png")
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+class ChartCache:
+    """LRU cache of rendered PNG charts, bounded by the total size of the images."""
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = CHART_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+        self._images = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get_or_render(self, key, make_figure):
+        start = time.perf_counter()
+        with self._lock:
+            png = self._images.get(key)
+            if png is not None:
+                self._images.move_to_end(key)
+                self._hits += 1
+        if png is not None:
+            telemetry.record("render.chart", time.perf_counter() - start, cache_hit=True)
+            return png
+        with self._lock:
+            self._misses += 1
+
+        with telemetry.span("render.chart", cache_hit=False):
+            png = figure_to_png(make_figure())
+        with self._lock:
+            if key not in self._images:
+                self._images[key] = png
+                self._size += len(png)
+            while self._size > self.max_bytes and len(self._images) > 1:
+                _, evicted = self._images.popitem(last=False)
+                self._size -= len(evicted)
+        return png
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._images),
+                "size_mb": round(self._size / (1024 * 1024), 2),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+charts = ChartCache()
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# Lowest mark for each status band, best band first
+BANDS = {
+    'Excellent': 90,
+    'Good': 80,
+    'Needs Improvement': 60,
+    'Concerning': 40,
+    'Failed': 0
+}
+WEAK_SUBJECT_THRESHOLD = 60
+
+
+def band_of(marks):
+    """Vectorized status band for a Series of marks."""
+    names = list(BANDS)
+    conditions = [marks >= threshold for threshold in BANDS.values()]
+    bands = np.select(conditions, names, default=names[-1])
+    return pd.Series(pd.Categorical(bands, categories=names, ordered=True), index=marks.index)
+
+
+def attendance_summary(df, subjects):
+    attendance = df['Attendance']
+    lowest, highest = attendance.idxmin(), attendance.idxmax()
+    return {
+        'average': attendance.mean(),
+        'min': attendance[lowest],
+        'max': attendance[highest],
+        'lowest_student': df.at[lowest, 'Name'],
+        'highest_student': df.at[highest, 'Name'],
+        'correlation': attendance.corr(df[subjects].mean(axis=1)),
+    }
+
+
+class CohortStats:
+    """
+    Everything the analysis views need about one dataset, computed once.
+
+    `students` holds one row per student indexed by Roll No, with the subject
+    marks, attendance, average, rank, percentile and a band per subject.
+    `subject_stats` holds mean/max/min/std per subject.
+    """
+
+    def __init__(self, df, subjects):
+        self.subjects = list(subjects)
+        marks = df[self.subjects]
+
+        table = df[['Roll No', 'Name', 'Attendance'] + self.subjects].copy()
+        table['Average'] = marks.mean(axis=1)
+        table['Rank'] = table['Average'].rank(ascending=False, method='min').astype(int)
+        table['Percentile'] = table['Average'].rank(pct=True) * 100
+        for subject in self.subjects:
+            table[f'{subject} Band'] = band_of(marks[subject])
+        self.students = table.set_index('Roll No', drop=False)
+
+        # Names are not guaranteed unique; like the original views, use the first match
+        positions = pd.Series(np.arange(len(table)), index=table['Name'].to_numpy())
+        self._position_by_name = positions[~positions.index.duplicated()].to_dict()
+
+        self.subject_stats = marks.agg(['mean', 'max', 'min', 'std']).T
+        avg_marks = self.subject_stats['mean']
+        self.weak_subjects = [s for s in self.subjects if avg_marks[s] < WEAK_SUBJECT_THRESHOLD]
+        self.strong_subjects = [s for s in self.subjects if avg_marks[s] >= WEAK_SUBJECT_THRESHOLD]
+        self.attendance = attendance_summary(df.reset_index(drop=True), self.subjects)
+
+    @property
+    def names(self):
+        return list(self._position_by_name)
+
+    def student(self, name):
+        return self.students.iloc[self._position_by_name[name]]
+
+    def by_roll_no(self, roll_no):
+        row = self.students.loc[roll_no]
+        return row.iloc[0] if isinstance(row, pd.DataFrame) else row
@@ -1,11 +1,8 @@
 import streamlit as st
 import pandas as pd
-import google.generativeai as genai
-import os
-from dotenv import load_dotenv
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
+import gemini_client
+from local_query import answer_locally
+from prompt_context import build_context, format_report
 
 def query_gemini(question, context):
     """
@@ -25,10 +22,7 @@ Answer the following question concisely and write your final calculation:
 {question}
 """
 
-    model = genai.GenerativeModel("gemini-1.5-pro") 
-    response = model.generate_content(final_prompt)
-
-    return response.text.strip()
+    return gemini_client.generate(final_prompt, policy="quality")
 
 st.title("EduEase - Dataset Query with Gemini AI")
 
@@ -42,9 +36,15 @@ if uploaded_file is not None:
 
     if st.button("Get Answer"):
 
-        context = df.to_string(index=False)
+        answer = answer_locally(question, df)
+        if answer is not None:
+            st.write("### Answer computed from the dataset")
+            st.write(answer)
+        else:
+            context, report = build_context(question, df)
 
-        answer = query_gemini(question, context)
+            answer = query_gemini(question, context)
 
-        st.write("### Answer from Gemini")
-        st.write(answer)
+            st.write("### Answer from Gemini")
+            st.write(answer)
+            st.caption(format_report(report))
@@ -0,0 +1,146 @@
+import os
+
+import pandas as pd
+
+REQUIRED_COLUMNS = ['Roll No', 'Name', 'Attendance']
+CSV_CHUNK_ROWS = 100_000
+# Section folders can only be read from under this directory; unset, folders cannot be read at all
+SECTIONS_DIR = os.getenv("SECTIONS_DIR")
+
+
+class DatasetError(ValueError):
+    """The uploaded file cannot be analysed; the message is shown to the teacher."""
+
+
+def validate_columns(columns):
+    missing = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing:
+        raise DatasetError("CSV file must contain 'Roll No', 'Name', and 'Attendance' columns.")
+    if len(columns) == len(REQUIRED_COLUMNS):
+        raise DatasetError("The file needs at least one subject column besides 'Roll No', 'Name' and 'Attendance'.")
+
+
+def downcast(chunk):
+    """
+    Shrink whole-number columns to the smallest int dtype that holds them.
+    Fractional marks stay float64: float32 would show as e.g. 72.30000305
+    in the views, prompts and reports. Name is left for the caller.
+    """
+    for col in chunk.columns:
+        if col == 'Name':
+            continue
+        series = chunk[col]
+        if col != 'Roll No' and not pd.api.types.is_numeric_dtype(series):
+            converted = pd.to_numeric(series, errors='coerce')
+            if converted.isna().sum() > series.isna().sum():
+                raise DatasetError(f"Column '{col}' must contain only numbers.")
+            series = converted
+        if not pd.api.types.is_numeric_dtype(series):
+            continue
+        if pd.api.types.is_float_dtype(series) and series.notna().all() and (series % 1 == 0).all():
+            series = series.astype('int64')
+        if pd.api.types.is_integer_dtype(series):
+            chunk[col] = pd.to_numeric(series, downcast='integer')
+        else:
+            chunk[col] = series.astype('float64')
+    return chunk
+
+
+def iter_chunks(file, name, chunk_rows=CSV_CHUNK_ROWS, on_raw_chunk=lambda chunk: None):
+    """
+    Yield validated, downcast chunks of a CSV file (or a Parquet file as one
+    chunk). `on_raw_chunk` sees each chunk before downcasting.
+    """
+    if name.lower().endswith('.parquet'):
+        try:
+            df = pd.read_parquet(file)
+        except ImportError as e:
+            raise DatasetError("Reading Parquet files needs the 'pyarrow' package.") from e
+        validate_columns(list(df.columns))
+        on_raw_chunk(df)
+        yield downcast(df)
+        return
+
+    columns = None
+    for chunk in pd.read_csv(file, chunksize=chunk_rows, encoding='utf-8-sig'):
+        if columns is None:
+            columns = [str(col).strip() for col in chunk.columns]
+            validate_columns(columns)
+        chunk.columns = columns
+        on_raw_chunk(chunk)
+        yield downcast(chunk)
+    if columns is None:
+        raise DatasetError("The uploaded file is empty.")
+
+
+def read_dataset(file, name, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    Read a CSV (in chunks) or Parquet file of student data with compact dtypes.
+    Returns the frame and a report of rows and memory before/after downcasting.
+    """
+    bytes_before = [0]
+
+    def measure(chunk):
+        bytes_before[0] += int(chunk.memory_usage(deep=True).sum())
+
+    chunks = list(iter_chunks(file, name, chunk_rows, measure))
+    df = chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+
+    df['Name'] = df['Name'].astype(str).astype('category')
+    bytes_after = int(df.memory_usage(deep=True).sum())
+    report = {
+        'rows': len(df),
+        'bytes_before': bytes_before[0],
+        'bytes_after': bytes_after,
+        'saved_ratio': 1 - bytes_after / bytes_before[0] if bytes_before[0] else 0.0,
+    }
+    return df, report
+
+
+def _inside(path, root):
+    return os.path.commonpath([path, root]) == root
+
+
+class SectionSource:
+    """One section's data file: an upload or a file in a folder on the server."""
+
+    def __init__(self, name, signature, opener):
+        self.name = name
+        self.signature = signature
+        self._opener = opener
+
+    def open(self):
+        return self._opener()
+
+    @classmethod
+    def from_upload(cls, uploaded_file):
+        signature = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+
+        def opener():
+            uploaded_file.seek(0)
+            return uploaded_file
+
+        return cls(uploaded_file.name, signature, opener)
+
+    @classmethod
+    def from_directory(cls, directory, root=SECTIONS_DIR):
+        """Every CSV or Parquet file in `directory`, a path relative to `root`."""
+        if not root:
+            raise DatasetError("Reading section folders on the server is not enabled.")
+        root = os.path.realpath(root)
+        directory = os.path.realpath(os.path.join(root, directory))
+        if not _inside(directory, root):
+            raise DatasetError("The folder must be inside the configured sections directory.")
+        sources = []
+        for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+            if not _inside(os.path.realpath(entry.path), root):
+                # a symlink out of the sections directory
+                continue
+            if entry.is_file() and entry.name.lower().endswith(('.csv', '.parquet')):
+                stat = entry.stat()
+                sources.append(cls(
+                    entry.name,
+                    (entry.path, stat.st_mtime, stat.st_size),
+                    lambda path=entry.path: path
+                ))
+        return sources
@@ -0,0 +1,74 @@
+import time
+
+import pandas as pd
+import streamlit as st
+
+import gemini_client
+import registry
+import telemetry
+from chart_cache import charts
+from LessonPlan import shared_store
+from MCQ import shared_bank
+from wellness import answer_cache
+
+WINDOWS = {
+    "Last hour": 60 * 60,
+    "Last 24 hours": 24 * 60 * 60,
+    "Last 7 days": 7 * 24 * 60 * 60,
+    "Everything recorded": None,
+}
+
+
+def _rate(spans, stage, column):
+    if spans.empty or column not in spans.columns:
+        return None
+    values = spans.loc[spans["stage"] == stage, column].dropna()
+    return values.astype(bool).mean() if not values.empty else None
+
+
+def _percent(value):
+    return "–" if value is None or pd.isna(value) else f"{value:.1%}"
+
+
+def diagnostics():
+    """Latency, error and cache statistics from the telemetry log. Open with ?diagnostics=1."""
+    st.header("Diagnostics")
+    st.caption(f"Spans are read from {telemetry.TELEMETRY_PATH}")
+
+    window = st.selectbox("Time window:", list(WINDOWS))
+    spans = telemetry.load()
+    if not spans.empty and WINDOWS[window] is not None:
+        spans = spans[spans["time"] >= time.time() - WINDOWS[window]]
+    if spans.empty:
+        st.info("No telemetry recorded yet. Use the app, then come back to this page.")
+        return
+
+    calls = spans[spans["stage"] == "llm.call"]
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Spans", f"{len(spans):,}")
+    col2.metric("LLM error rate", _percent(1 - calls["ok"].mean() if not calls.empty else None))
+    col3.metric("LLM fallback rate", _percent(_rate(spans, "llm.call", "fallback")))
+    col4.metric("Response cache hits", _percent(_rate(spans, "llm.generate", "cache_hit")))
+    col1, col2 = st.columns(2)
+    col1.metric("Counsellor cache hits", _percent(_rate(spans, "cache.semantic", "cache_hit")))
+    col2.metric("Chart cache hits", _percent(_rate(spans, "render.chart", "cache_hit")))
+
+    group_by = st.multiselect("Group by:", ["stage", "page", "model"], default=["stage", "page", "model"])
+    st.subheader("Latency by stage")
+    st.dataframe(telemetry.summarize(spans, by=group_by or ["stage"]))
+
+    errors = spans[~spans["ok"].astype(bool)]
+    if not errors.empty:
+        st.subheader("Recent errors")
+        columns = [col for col in ["time", "stage", "page", "model", "error", "seconds"] if col in errors.columns]
+        recent = errors[columns].tail(50).copy()
+        recent["time"] = pd.to_datetime(recent["time"], unit="s")
+        st.dataframe(recent.iloc[::-1], hide_index=True)
+
+    st.subheader("This server process")
+    st.write("Loaded resources", pd.DataFrame(registry.stats()))
+    st.write("Chart cache", charts.stats())
+    st.write("Counsellor answer cache", answer_cache().stats())
+    st.write("Response cache", gemini_client.shared_cache().stats())
+    st.write("Question bank", shared_bank().stats())
+    st.write("Saved lesson plans", shared_store().stats())
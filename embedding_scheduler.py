@@ -0,0 +1,122 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from google.api_core.exceptions import ResourceExhausted
+from langchain.embeddings.base import Embeddings
+
+import telemetry
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_MAX_IN_FLIGHT = int(os.getenv("EMBED_MAX_IN_FLIGHT", "4"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "6"))
+FAKE_LATENCY = float(os.getenv("EDUEASE_FAKE_LATENCY_MS", "0")) / 1000
+
+
+def is_rate_limited(error):
+    if isinstance(error, ResourceExhausted):
+        return True
+    message = str(error).lower()
+    return "429" in message or "quota" in message or "rate limit" in message
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic offline stand-in for an embedding API: each text maps to a
+    unit vector seeded by its hash. `latency` is slept once per request.
+    """
+
+    def __init__(self, dimensions=384, latency=FAKE_LATENCY):
+        self.model_name = f"fake-{dimensions}"
+        self.dimensions = dimensions
+        self.latency = latency
+
+    def _vector(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimensions)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._vector(text)
+
+
+class EmbeddingScheduler(Embeddings):
+    """
+    Wraps any LangChain embeddings object so that documents are embedded in
+    fixed-size batches, a few batches at a time, and rate-limit errors are
+    retried with jittered exponential backoff instead of failing the caller.
+    """
+
+    def __init__(self, embeddings, batch_size=EMBED_BATCH_SIZE, max_in_flight=EMBED_MAX_IN_FLIGHT,
+                 max_retries=EMBED_MAX_RETRIES, base_delay=1.0, max_delay=60.0):
+        self.embeddings = embeddings
+        self.model_name = getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None)
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._chunks = 0
+        self._batches = 0
+        self._retries = 0
+        self._seconds = 0.0
+
+    def _with_retry(self, fn, arg):
+        attempt = 0
+        while True:
+            try:
+                return fn(arg)
+            except Exception as e:
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    raise
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                with self._lock:
+                    self._retries += 1
+                time.sleep(random.uniform(delay / 2, delay))
+                attempt += 1
+
+    def _embed_batch(self, texts):
+        with telemetry.span("embed.batch", model=self.model_name, chunks=len(texts)):
+            vectors = self._with_retry(self.embeddings.embed_documents, texts)
+        with self._lock:
+            self._batches += 1
+        return vectors
+
+    def embed_documents(self, texts):
+        start = time.perf_counter()
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) <= 1 or self.max_in_flight <= 1:
+            results = [self._embed_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(batches))) as pool:
+                results = list(pool.map(telemetry.bind(self._embed_batch), batches))
+        with self._lock:
+            self._chunks += len(texts)
+            self._seconds += time.perf_counter() - start
+        return [vector for batch in results for vector in batch]
+
+    def embed_query(self, text):
+        with telemetry.span("embed.query", model=self.model_name):
+            return self._with_retry(self.embeddings.embed_query, text)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "chunks": self._chunks,
+                "batches": self._batches,
+                "retries": self._retries,
+                "seconds": round(self._seconds, 3),
+                "chunks_per_sec": round(self._chunks / self._seconds, 2) if self._seconds else 0.0,
+            }
@@ -0,0 +1,254 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from dotenv import load_dotenv
+from google.api_core import exceptions as google_exceptions
+
+import registry
+import response_cache
+import telemetry
+
+load_dotenv()
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+DEFAULT_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "60"))
+MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+# Simulated latency of the offline stand-ins for Gemini and the embedding APIs
+FAKE_LATENCY = float(os.getenv("EDUEASE_FAKE_LATENCY_MS", "0")) / 1000
+# generation_config that makes the model reply with JSON only
+JSON_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
+# Models tried in order for each kind of request. A rate-limited model hands
+# over to the next one straight away; transient server errors are retried first.
+POLICIES = {
+    "quality": ["gemini-1.5-pro", "gemini-1.5-flash"],
+    "fast": ["gemini-2.0-flash", "gemini-1.5-flash"],
+    "chat": ["gemini-1.5-flash", "gemini-2.0-flash"],
+}
+
+RATE_LIMIT_ERRORS = (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)
+TRANSIENT_ERRORS = (
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+)
+
+
+class GeminiBackend:
+    """Calls the real Gemini API. Model handles come from the process registry."""
+
+    def __init__(self, api_key=GEMINI_API_KEY):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+
+    def generate(self, model_name, prompt, stream=False, timeout=DEFAULT_TIMEOUT, generation_config=None):
+        model = registry.gemini_model(model_name)
+        return model.generate_content(
+            prompt,
+            stream=stream,
+            generation_config=generation_config,
+            request_options={"timeout": timeout},
+        )
+
+
+class FakeResponse:
+    def __init__(self, text, chunk_size=40):
+        self.text = text
+        self._chunk_size = chunk_size
+
+    def __iter__(self):
+        for i in range(0, len(self.text), self._chunk_size):
+            yield FakeResponse(self.text[i:i + self._chunk_size])
+
+
+class FakeBackend:
+    """
+    Deterministic offline stand-in for Gemini. `responder(model_name, prompt)`
+    can supply canned text; otherwise the reply is derived from a prompt hash.
+    """
+
+    def __init__(self, latency=FAKE_LATENCY, responder=None):
+        self.latency = latency
+        self.responder = responder
+
+    def generate(self, model_name, prompt, stream=False, timeout=DEFAULT_TIMEOUT, generation_config=None):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.responder is not None:
+            text = self.responder(model_name, prompt)
+        else:
+            digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+            text = f"- Offline response from {model_name} ({digest})"
+        return FakeResponse(text)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+_metrics = deque(maxlen=2000)
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = FakeBackend() if os.getenv("EDUEASE_FAKE_GEMINI") == "1" else GeminiBackend()
+        return _backend
+
+
+def set_backend(backend):
+    """Swap the backend used by every page, e.g. FakeBackend() for offline runs."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def is_configured():
+    return bool(GEMINI_API_KEY) or isinstance(get_backend(), FakeBackend)
+
+
+def _record(policy, model_name, seconds, ok, attempt, fallback, error=None):
+    _metrics.append({
+        "policy": policy,
+        "model": model_name,
+        "seconds": round(seconds, 3),
+        "ok": ok,
+        "attempt": attempt,
+        "fallback": fallback,
+        "error": type(error).__name__ if error is not None else None,
+        "time": time.time(),
+    })
+    telemetry.record(
+        "llm.call", seconds, ok=ok, model=model_name, policy=policy, attempt=attempt,
+        fallback=fallback, error=type(error).__name__ if error is not None else None,
+    )
+
+
+def metrics():
+    """Per-call latency records, most recent last."""
+    return list(_metrics)
+
+
+def _backoff(attempt):
+    delay = min(30.0, 2 ** attempt)
+    time.sleep(random.uniform(delay / 2, delay))
+
+
+def call_with_policy(policy, fn):
+    """
+    Call `fn(model_name)` for each model of the policy in turn until one
+    succeeds. A policy name that is not in POLICIES is treated as one model.
+    """
+    models = POLICIES.get(policy, [policy])
+    last_error = None
+    for position, model_name in enumerate(models):
+        has_fallback = position < len(models) - 1
+        for attempt in range(MAX_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                result = fn(model_name)
+            except Exception as e:
+                _record(policy, model_name, time.perf_counter() - start, False, attempt, position > 0, e)
+                last_error = e
+                if isinstance(e, RATE_LIMIT_ERRORS) and has_fallback:
+                    break
+                if not isinstance(e, RATE_LIMIT_ERRORS + TRANSIENT_ERRORS) or attempt == MAX_RETRIES:
+                    break
+                _backoff(attempt)
+                continue
+            _record(policy, model_name, time.perf_counter() - start, True, attempt, position > 0)
+            return result
+    raise last_error
+
+
+def _text(response):
+    try:
+        return response.text.strip()
+    except ValueError:
+        # response was blocked or carried no text parts
+        return ""
+
+
+def _usage(response):
+    """Token counts reported by the API, if any."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return {}
+    return {
+        "tokens_in": getattr(usage, "prompt_token_count", None),
+        "tokens_out": getattr(usage, "candidates_token_count", None),
+    }
+
+
+def shared_cache():
+    return registry.get(("response_cache", response_cache.DB_PATH), response_cache.ResponseCache)
+
+
+def _cache_model(policy):
+    model_name = POLICIES.get(policy, [policy])[0]
+    # keep offline responses apart from real ones in a shared cache file
+    return f"fake/{model_name}" if isinstance(get_backend(), FakeBackend) else model_name
+
+
+def cache_key(prompt, policy="fast", generation_config=None):
+    """Cache key of a response: the policy's primary model, the normalized prompt and generation parameters."""
+    return response_cache.make_key(_cache_model(policy), prompt, {"generation_config": generation_config})
+
+
+def cache_store(namespace, prompt, text, policy="fast", generation_config=None):
+    """Store a response produced outside generate(), e.g. one item of a batched request."""
+    shared_cache().put(cache_key(prompt, policy, generation_config), namespace, _cache_model(policy), text)
+
+
+def cache_lookup(prompt, policy="fast", generation_config=None):
+    return shared_cache().get(cache_key(prompt, policy, generation_config))
+
+
+def generate(prompt, policy="fast", timeout=DEFAULT_TIMEOUT, generation_config=None, cache_namespace=None):
+    """
+    Return the stripped response text, or "" when the model returned no text.
+    With a cache_namespace, responses are read from and written to the
+    persistent response cache.
+    """
+    with telemetry.span("llm.generate", policy=policy) as tags:
+        if cache_namespace is not None:
+            cached = cache_lookup(prompt, policy, generation_config)
+            tags["cache_hit"] = cached is not None
+            if cached is not None:
+                return cached
+
+        model_name, response = call_with_policy(
+            policy,
+            lambda model_name: (model_name, get_backend().generate(model_name, prompt, False, timeout, generation_config)),
+        )
+        text = _text(response)
+        tags.update(model=model_name, **_usage(response))
+        if cache_namespace is not None and text:
+            cache_store(cache_namespace, prompt, text, policy, generation_config)
+        return text
+
+
+def stream(prompt, policy="chat", timeout=DEFAULT_TIMEOUT, generation_config=None):
+    """
+    Yield response text chunks as they arrive. Retries and fallbacks apply
+    until the stream is opened; errors after that propagate to the caller.
+    """
+    with telemetry.span("llm.stream", policy=policy) as tags:
+        start = time.perf_counter()
+        model_name, response = call_with_policy(
+            policy,
+            lambda model_name: (model_name, get_backend().generate(model_name, prompt, True, timeout, generation_config)),
+        )
+        tags["model"] = model_name
+        for chunk in response:
+            tags.update(_usage(chunk))
+            try:
+                text = chunk.text
+            except ValueError:
+                # chunk carried no text parts (e.g. only safety metadata)
+                continue
+            tags.setdefault("ttft", round(time.perf_counter() - start, 4))
+            yield text
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from langchain.vectorstores import Chroma
+
+CACHE_DIR = "docs/chroma/"
+INDEX_FILE = os.path.join(CACHE_DIR, "lesson_cache.json")
+MAX_CACHE_MB = float(os.getenv("LESSON_CACHE_MAX_MB", "256"))
+
+# models/embedding-001 returns 768 float32 values per chunk
+EMBEDDING_DIM = 768
+
+_lock = threading.Lock()
+
+
+def cache_key(stream, chunk_size, chunk_overlap, embedding_model):
+    """
+    Content address of an embedded lesson: the PDF bytes plus everything that
+    changes how those bytes are chunked and embedded.
+    """
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for block in iter(lambda: stream.read(1024 * 1024), b""):
+        digest.update(block)
+    stream.seek(0)
+    digest.update(f"|{chunk_size}|{chunk_overlap}|{embedding_model}".encode())
+    return digest.hexdigest()
+
+
+def collection_name(key):
+    # Chroma collection names are limited to 63 characters
+    return f"lesson_{key[:48]}"
+
+
+def _read_index():
+    try:
+        with open(INDEX_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_index(index):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = INDEX_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, INDEX_FILE)
+
+
+def lookup(key):
+    """Return True if an embedded collection exists for this key, marking it as recently used."""
+    with _lock:
+        index = _read_index()
+        entry = index.get(key)
+        if entry is None:
+            return False
+        entry["last_used"] = time.time()
+        _write_index(index)
+        return True
+
+
+def record(key, chunks, text_bytes):
+    """Register a freshly embedded collection and its approximate on-disk size."""
+    size_bytes = text_bytes + chunks * EMBEDDING_DIM * 4
+    with _lock:
+        index = _read_index()
+        index[key] = {
+            "collection": collection_name(key),
+            "chunks": chunks,
+            "size_bytes": size_bytes,
+            "created": time.time(),
+            "last_used": time.time(),
+        }
+        _write_index(index)
+
+
+def forget(key):
+    with _lock:
+        index = _read_index()
+        if index.pop(key, None) is not None:
+            _write_index(index)
+
+
+def evict(keep=None, max_bytes=None):
+    """
+    Drop least recently used collections until the cache fits in max_bytes.
+    The collection for `keep` is never evicted.
+    """
+    if max_bytes is None:
+        max_bytes = MAX_CACHE_MB * 1024 * 1024
+
+    with _lock:
+        index = _read_index()
+        total = sum(entry["size_bytes"] for entry in index.values())
+        evicted = []
+        for key, entry in sorted(index.items(), key=lambda item: item[1]["last_used"]):
+            if total <= max_bytes:
+                break
+            if key == keep:
+                continue
+            Chroma(collection_name=entry["collection"], persist_directory=CACHE_DIR).delete_collection()
+            total -= entry["size_bytes"]
+            evicted.append(key)
+        for key in evicted:
+            del index[key]
+        if evicted:
+            _write_index(index)
+    return evicted
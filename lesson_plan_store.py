@@ -0,0 +1,144 @@
+import os
+import time
+import uuid
+
+import response_cache
+
+DB_PATH = os.path.join(response_cache.CACHE_DIR, "lesson_plans.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    id TEXT PRIMARY KEY,
+    unit_details TEXT NOT NULL,
+    session_duration REAL NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS plans_updated ON plans (updated);
+CREATE TABLE IF NOT EXISTS sessions (
+    plan_id TEXT NOT NULL REFERENCES plans (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    focus TEXT NOT NULL,
+    duration REAL NOT NULL,
+    content TEXT NOT NULL,
+    base_duration REAL NOT NULL,
+    base_content TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (plan_id, position)
+);
+"""
+
+
+class LessonPlanStore:
+    """
+    SQLite store of lesson plans, one row per session, so a single session can
+    be replaced or inserted without touching the rest of the plan. Each session
+    also keeps the text it was written with (`base_content` at `base_duration`)
+    so that resizing always starts from the same text.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._connection = response_cache.connect(path, SCHEMA)
+
+    def create(self, unit_details, session_duration, sessions):
+        """Save a new plan. `sessions` are dicts with title, focus, duration and content. Returns its id."""
+        plan_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT INTO plans (id, unit_details, session_duration, created, updated) VALUES (?, ?, ?, ?, ?)",
+            (plan_id, unit_details, session_duration, now, now),
+        )
+        conn.executemany(
+            "INSERT INTO sessions (plan_id, position, title, focus, duration, content, base_duration, base_content, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(plan_id, position, s["title"], s["focus"], s["duration"], s["content"], s["duration"], s["content"], now)
+             for position, s in enumerate(sessions)],
+        )
+        conn.commit()
+        return plan_id
+
+    def get(self, plan_id):
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT unit_details, session_duration, created, updated FROM plans WHERE id = ?", (plan_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        columns = ("title", "focus", "duration", "content", "base_duration", "base_content")
+        sessions = [
+            dict(zip(columns, row))
+            for row in conn.execute(
+                f"SELECT {', '.join(columns)} FROM sessions WHERE plan_id = ? ORDER BY position", (plan_id,)
+            )
+        ]
+        unit_details, session_duration, created, updated = row
+        return {
+            "id": plan_id,
+            "unit_details": unit_details,
+            "session_duration": session_duration,
+            "created": created,
+            "updated": updated,
+            "sessions": sessions,
+        }
+
+    def recent(self, limit=20):
+        """(id, unit details, number of sessions, last update) of the most recently edited plans."""
+        conn = self._connection()
+        return conn.execute(
+            "SELECT p.id, p.unit_details, COUNT(s.position), p.updated FROM plans p "
+            "LEFT JOIN sessions s ON s.plan_id = p.id GROUP BY p.id ORDER BY p.updated DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+
+    def _touch(self, conn, plan_id, now):
+        conn.execute("UPDATE plans SET updated = ? WHERE id = ?", (now, plan_id))
+
+    def update_session(self, plan_id, position, **fields):
+        """Change some of a session's title, focus, duration, content and base text."""
+        allowed = {
+            key: value for key, value in fields.items()
+            if key in ("title", "focus", "duration", "content", "base_duration", "base_content")
+        }
+        if not allowed:
+            return
+        now = time.time()
+        assignments = ", ".join(f"{key} = ?" for key in allowed)
+        conn = self._connection()
+        conn.execute(
+            f"UPDATE sessions SET {assignments}, updated = ? WHERE plan_id = ? AND position = ?",
+            (*allowed.values(), now, plan_id, position),
+        )
+        self._touch(conn, plan_id, now)
+        conn.commit()
+
+    def insert_session(self, plan_id, position, session):
+        """Insert a session before `position` (at the end if past it), shifting later sessions down."""
+        now = time.time()
+        conn = self._connection()
+        # Shift in two steps so the primary key never collides mid-update
+        conn.execute("UPDATE sessions SET position = -position - 1 WHERE plan_id = ? AND position >= ?", (plan_id, position))
+        conn.execute("UPDATE sessions SET position = -position WHERE plan_id = ? AND position < 0", (plan_id,))
+        count = conn.execute("SELECT COUNT(*) FROM sessions WHERE plan_id = ?", (plan_id,)).fetchone()[0]
+        conn.execute(
+            "INSERT INTO sessions (plan_id, position, title, focus, duration, content, base_duration, base_content, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (plan_id, min(position, count), session["title"], session["focus"], session["duration"],
+             session["content"], session["duration"], session["content"], now),
+        )
+        self._touch(conn, plan_id, now)
+        conn.commit()
+
+    def delete(self, plan_id):
+        conn = self._connection()
+        conn.execute("DELETE FROM plans WHERE id = ?", (plan_id,))
+        conn.commit()
+
+    def stats(self):
+        conn = self._connection()
+        plans, sessions = conn.execute(
+            "SELECT (SELECT COUNT(*) FROM plans), (SELECT COUNT(*) FROM sessions)"
+        ).fetchone()
+        return {"plans": plans, "sessions": sessions}
@@ -1,26 +1,57 @@
 import streamlit as st
-import google.generativeai as genai
 from langchain.vectorstores import Chroma
 from langchain.prompts import PromptTemplate
-from langchain.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.chains import RetrievalQA
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
 import os
-from dotenv import load_dotenv
 import asyncio
-
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-if not GEMINI_API_KEY:
+import math
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import gemini_client
+import lesson_cache
+import pdf_ingest
+import registry
+import telemetry
+from embedding_scheduler import EmbeddingScheduler
+
+if not gemini_client.is_configured():
     st.error("GEMINI_API_KEY not found in .env file")
     st.stop()
 
-genai.configure(api_key=GEMINI_API_KEY)
+CHUNK_SIZE = 1500
+CHUNK_OVERLAP = 150
+EMBEDDING_MODEL = "models/embedding-001"
+
+MAP_GROUP_SIZE = 4
+REDUCE_FAN_IN = 5
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+
+QUICK_MODE = "Quick (key passages)"
+MAP_REDUCE_MODE = "Full lesson (map-reduce)"
+
+MAP_TEMPLATE = """Summarize this part of a lesson for a teacher.
+Provide bullet points only, keeping the answer concise and covering every topic mentioned.
+
+Lesson excerpt:
+{text}
+
+Bullet points:"""
 
-def run_summary(llm, retriever):
-    """Helper to run the summary query with a given LLM."""
+REDUCE_TEMPLATE = """The following are bullet-point summaries of consecutive parts of one lesson.
+Merge them into a single concise bullet-point summary for a teacher, keeping the lesson order
+and dropping repeated points.
+
+Partial summaries:
+{text}
+
+Bullet points:"""
+
+# Summaries are cached per lesson, under this prefix plus the lesson cache key
+SUMMARY_NAMESPACE = "lessonsummarize"
+
+SUMMARY_QUERY = "Summarize this lesson for me. I am a teacher, I need to better understand this lesson. Put it in bullet points."
+
+def run_summary(vectordb, cache_namespace=None):
+    """Summarize the lesson from the chunks most relevant to the summary request."""
     template = """Use the following context to summarize the lesson for a teacher.
 Provide bullet points only, keeping the answer concise.
 If you don't know the answer, say you don't know.
@@ -37,78 +68,162 @@ Helpful Answer:"""
         template=template
     )
 
-    qa_chain = RetrievalQA.from_chain_type(
-        llm,
-        retriever=retriever,
-        chain_type_kwargs={"prompt": QA_CHAIN_PROMPT}
+    with telemetry.span("retrieval.chroma", collection="lesson") as tags:
+        docs = vectordb.similarity_search(SUMMARY_QUERY)
+        tags["results"] = len(docs)
+    context = "\n\n".join(doc.page_content for doc in docs)
+    return gemini_client.generate(QA_CHAIN_PROMPT.format(context=context, question=SUMMARY_QUERY), policy="quality",
+                                   cache_namespace=cache_namespace)
+
+def load_chunks(vectordb):
+    """Return the stored chunk texts of a lesson in document order."""
+    data = vectordb.get(include=["documents", "metadatas"])
+    ordered = sorted(
+        zip(data["documents"], data["metadatas"]),
+        key=lambda item: (item[1].get("chunk", 0), item[1].get("page", 0))
     )
+    return [text for text, _ in ordered]
+
+
+def count_summary_calls(num_chunks):
+    """Number of LLM calls in the map-reduce tree, used to size the progress bar."""
+    level = math.ceil(num_chunks / MAP_GROUP_SIZE)
+    total = level
+    while level > 1:
+        level = math.ceil(level / REDUCE_FAN_IN)
+        total += level
+    return total
+
+
+def summarize_level(texts, template, concurrency, on_done, cache_namespace=None):
+    """Summarize each text concurrently, preserving input order in the result."""
+    results = [None] * len(texts)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {
+            pool.submit(telemetry.bind(gemini_client.generate), template.format(text=text), "quality",
+                        cache_namespace=cache_namespace): i
+            for i, text in enumerate(texts)
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            on_done()
+    return results
+
+
+def map_reduce_summary(chunks, concurrency=SUMMARY_CONCURRENCY, on_done=lambda: None, cache_namespace=None):
+    """
+    Summarize every chunk group in parallel, then merge the partial summaries
+    REDUCE_FAN_IN at a time until one summary is left. Latency grows with the
+    depth of this tree rather than with the number of chunks. With a
+    cache_namespace every map and reduce output is cached, so summarizing the
+    same lesson again makes no model calls.
+    """
+    groups = ["\n\n".join(chunks[i:i + MAP_GROUP_SIZE]) for i in range(0, len(chunks), MAP_GROUP_SIZE)]
+    partials = summarize_level(groups, MAP_TEMPLATE, concurrency, on_done, cache_namespace)
+    while len(partials) > 1:
+        groups = ["\n\n".join(partials[i:i + REDUCE_FAN_IN]) for i in range(0, len(partials), REDUCE_FAN_IN)]
+        partials = summarize_level(groups, REDUCE_TEMPLATE, concurrency, on_done, cache_namespace)
+    return partials[0] if partials else ""
+
+
+def generate_summary(vectordb, mode, concurrency, key):
+    cache_namespace = f"{SUMMARY_NAMESPACE}.{key}"
+    if mode == MAP_REDUCE_MODE:
+        chunks = load_chunks(vectordb)
+        total_calls = count_summary_calls(len(chunks))
+        progress = st.progress(0.0, text="Summarizing lesson sections...")
+        done = [0]
+
+        def on_done():
+            done[0] += 1
+            progress.progress(min(done[0] / total_calls, 1.0), text=f"Summarized {done[0]} of {total_calls} sections")
+
+        summary_text = map_reduce_summary(chunks, concurrency, on_done, cache_namespace)
+        progress.empty()
+        return summary_text
+
+    return run_summary(vectordb, cache_namespace)
 
-    return qa_chain({
-        "query": "Summarize this lesson for me. I am a teacher, I need to better understand this lesson. Put it in bullet points."
-    })
 
 def summarize():
     uploaded_file = st.file_uploader("Upload PDF File Of Your Lesson", type="pdf")
+    mode = st.radio("Summary mode:", [QUICK_MODE, MAP_REDUCE_MODE], horizontal=True)
+    concurrency = SUMMARY_CONCURRENCY
+    if mode == MAP_REDUCE_MODE:
+        concurrency = st.slider("Parallel model requests:", min_value=1, max_value=16, value=SUMMARY_CONCURRENCY)
 
-    if uploaded_file:
-        with st.spinner("Summarizing lesson into bullet points..."):
-            with open(uploaded_file.name, mode='wb') as w:
-                w.write(uploaded_file.getvalue())
-
-            loader = PyPDFLoader(uploaded_file.name)
-            pages = loader.load()
-
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1500,
-                chunk_overlap=150
-            )
-            splits = text_splitter.split_documents(pages)
+    if not uploaded_file:
+        return
+    key = lesson_cache.cache_key(uploaded_file, CHUNK_SIZE, CHUNK_OVERLAP, EMBEDDING_MODEL)
 
+    # Only the button starts a summary; changing the mode or slider just reruns the page
+    if st.button("Summarize Lesson"):
+        with st.spinner("Summarizing lesson into bullet points..."):
             try:
                 asyncio.get_running_loop()
             except RuntimeError:
                 asyncio.set_event_loop(asyncio.new_event_loop())
 
-            embedding = GoogleGenerativeAIEmbeddings(
-                model="models/embedding-001",
-                google_api_key=GEMINI_API_KEY
-            )
-
-            persist_directory = 'docs/chroma/'
-            vectordb = Chroma.from_documents(
-                documents=splits,
-                embedding=embedding,
-                persist_directory=persist_directory
-            )
-
-            llm_pro = ChatGoogleGenerativeAI(
-                model="gemini-1.5-pro",
-                temperature=0,
-                google_api_key=GEMINI_API_KEY
-            )
-
-            try:
-                result = run_summary(llm_pro, vectordb.as_retriever())
-            except Exception as e:
-                if "429" in str(e):
-                    llm_flash = ChatGoogleGenerativeAI(
-                        model="gemini-1.5-flash",
-                        temperature=0,
-                        google_api_key=GEMINI_API_KEY
-                    )
-                    result = run_summary(llm_flash, vectordb.as_retriever())
-                else:
-                    st.error(f"Error generating summary: {e}")
+            embedding = EmbeddingScheduler(registry.google_embeddings(EMBEDDING_MODEL))
+
+            persist_directory = lesson_cache.CACHE_DIR
+            vectordb = None
+            if lesson_cache.lookup(key):
+                vectordb = Chroma(
+                    collection_name=lesson_cache.collection_name(key),
+                    embedding_function=embedding,
+                    persist_directory=persist_directory
+                )
+                if vectordb._collection.count() == 0:
+                    lesson_cache.forget(key)
+                    vectordb = None
+
+            if vectordb is None:
+                text_splitter = RecursiveCharacterTextSplitter(
+                    chunk_size=CHUNK_SIZE,
+                    chunk_overlap=CHUNK_OVERLAP
+                )
+                vectordb = Chroma(
+                    collection_name=lesson_cache.collection_name(key),
+                    embedding_function=embedding,
+                    persist_directory=persist_directory
+                )
+                try:
+                    with telemetry.span("ingest.pdf", model=EMBEDDING_MODEL) as tags:
+                        chunks, text_bytes = pdf_ingest.ingest(
+                            uploaded_file, uploaded_file.name, vectordb, text_splitter,
+                            batch_size=embedding.batch_size * embedding.max_in_flight
+                        )
+                        tags["chunks"] = chunks
+                except Exception as e:
                     vectordb.delete_collection()
+                    st.error(f"Error reading lesson PDF: {e}")
                     return
+                if chunks == 0:
+                    vectordb.delete_collection()
+                    st.error("No text could be extracted from this PDF.")
+                    return
+                lesson_cache.record(key, chunks, text_bytes)
+                lesson_cache.evict(keep=key)
+                stats = embedding.stats()
+                st.caption(
+                    f"Embedded {stats['chunks']} chunks at {stats['chunks_per_sec']} chunks/sec "
+                    f"({stats['retries']} rate-limit retries)"
+                )
 
-            summary_text = result.get("result", "").strip()
-
-            if summary_text:
-                st.markdown("### 📌 Lesson Summary")
-                st.markdown(summary_text)
-            else:
-                st.error("No summary generated from the model.")
-
-            vectordb.delete_collection()
+            try:
+                summary_text = generate_summary(vectordb, mode, concurrency, key)
+            except Exception as e:
+                st.error(f"Error generating summary: {e}")
+                return
+        st.session_state['lesson_summary'] = {"key": key, "mode": mode, "text": summary_text}
+        if summary_text:
             st.info("Lesson summarized successfully!")
+
+    summary = st.session_state.get('lesson_summary')
+    if summary and summary["key"] == key and summary["mode"] == mode:
+        if summary["text"]:
+            st.markdown("### 📌 Lesson Summary")
+            st.markdown(summary["text"])
+        else:
+            st.error("No summary generated from the model.")
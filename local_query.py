@@ -0,0 +1,202 @@
+import re
+
+from dataset_io import REQUIRED_COLUMNS
+
+AVERAGE_COLUMN = 'Average'
+MAX_LISTED_STUDENTS = 50
+
+# Longer phrases first so "no more than" is not read as "more than"
+COMPARATORS = [
+    (r"at most|no more than|or less|or below|<=", "<="),
+    (r"at least|no less than|or more|or above|>=", ">="),
+    (r"below|under|less than|lower than|fewer than|<", "<"),
+    (r"above|over|more than|greater than|higher than|>", ">"),
+    (r"exactly|equal to|equals|=", "=="),
+]
+MIN_WORDS = r"lowest|minimum|least|worst|poorest|min"
+# not "most": "the most common attendance" asks for a mode, not a maximum
+MAX_WORDS = r"highest|maximum|best|max"
+AGGREGATES = [
+    (r"average|mean", "mean"),
+    (r"median", "median"),
+    (r"standard deviation|std", "std"),
+]
+
+
+def _fmt(value):
+    value = float(value)
+    return f"{value:.0f}" if value.is_integer() else f"{value:.2f}"
+
+
+def _subjects(df):
+    return [col for col in df.columns if col not in REQUIRED_COLUMNS]
+
+
+# Questions the plans cannot express; they are left to Gemini
+UNSUPPORTED = (
+    r"\bbetween\b|\bpercent(age)?\b|\bproportion\b|\bfraction\b|\bratio\b|(?<!\d)%"
+    r"|\bwhich subjects?\b|\beach subject\b|\bper subject\b|\bby subject\b|\bevery subject\b|\bsubject[- ]wise\b"
+    r"|\bcompare\b|\bcorrelat|\bcommon\b|\bfrequent|\bmode\b"
+)
+# Words that may follow "in", "for" or "by" without naming a subject
+NOT_SUBJECTS = {
+    "the", "a", "an", "this", "our", "my", "class", "total", "all", "overall", "dataset", "data",
+    "school", "marks", "mark", "score", "scores", "average", "subjects", "order",
+}
+
+
+def _named_columns(question, df):
+    """Every subject or attendance column the question names."""
+    text = question.lower()
+    return [
+        col for col in _subjects(df) + ['Attendance']
+        if re.search(rf"\b{re.escape(str(col).lower())}\b", text)
+    ]
+
+
+def _names_unknown_subject(text, df):
+    """True for e.g. "in Science" when the dataset has no Science column."""
+    known = {str(col).lower() for col in df.columns} | NOT_SUBJECTS
+    return any(word not in known for word in re.findall(r"\b(?:in|for|by)\s+([a-z]+)", text))
+
+
+def _find_column(question, df):
+    """The subject or attendance column the question names, else the overall average if asked for."""
+    named = _named_columns(question, df)
+    if named:
+        return named[0]
+    if re.search(r"\b(overall|total|average marks|average score|class average|marks|score)\b", question.lower()):
+        return AVERAGE_COLUMN
+    return None
+
+
+def _with_average(df):
+    if AVERAGE_COLUMN in df.columns:
+        return df
+    return df.assign(**{AVERAGE_COLUMN: df[_subjects(df)].mean(axis=1)})
+
+
+def _comparison(text):
+    # "60 or more" puts the number first
+    postfix = re.search(r"(-?\d+(?:\.\d+)?)\s*%?\s*or (more|above|less|below)\b", text)
+    if postfix:
+        return (">=" if postfix.group(2) in ("more", "above") else "<="), float(postfix.group(1))
+    for pattern, op in COMPARATORS:
+        match = re.search(rf"(?:{pattern})\s*(-?\d+(?:\.\d+)?)\s*%?", text)
+        if match:
+            return op, float(match.group(1))
+    return None
+
+
+def parse_question(question, df):
+    """
+    Translate a common data question into a query plan (a dict), or None when
+    the question is not exactly one of the supported shapes: one column, at
+    most one number and at most one condition.
+    """
+    text = question.lower()
+    if re.search(UNSUPPORTED, text) or _names_unknown_subject(text, df) or len(_named_columns(question, df)) > 1:
+        return None
+    # Comparator phrases such as "or more" contain "or"; any other and/or joins conditions
+    if re.search(r"\b(and|or)\b", re.sub("|".join(pattern for pattern, _ in COMPARATORS), " ", text)):
+        return None
+    numbers = re.findall(r"-?\d+(?:\.\d+)?", text)
+    if len(numbers) > 1:
+        return None
+    column = _find_column(question, df)
+
+    top = re.search(r"\b(top|bottom|best|worst|highest|lowest)\s+(\d+)\b", text)
+    if top:
+        column = column or AVERAGE_COLUMN
+        order = "desc" if top.group(1) in ("top", "best", "highest") else "asc"
+        return {"op": "top_k", "column": column, "k": int(top.group(2)), "order": order}
+
+    comparison = _comparison(text)
+    if comparison:
+        if column is None:
+            return None
+        op, value = comparison
+        kind = "count" if re.search(r"\bhow many\b|\bnumber of\b|\bcount\b", text) else "list"
+        return {"op": kind, "column": column, "comparator": op, "value": value}
+
+    if numbers:
+        # a number the plans below would ignore
+        return None
+    if re.search(r"\bhow many\b|\bnumber of\b|\bcount\b", text):
+        # Without a condition only the class size can be counted; the plans
+        # below do not count, e.g. "how many students have the highest attendance?"
+        if column is None and not re.search(rf"\b({MIN_WORDS}|{MAX_WORDS})\b", text) \
+                and re.search(r"\bhow many (students|rows|records)\b", text):
+            return {"op": "size"}
+        return None
+    if column and re.search(rf"\b({MIN_WORDS})\b", text):
+        return {"op": "extreme", "column": column, "which": "min"}
+    if column and re.search(rf"\b({MAX_WORDS})\b", text):
+        return {"op": "extreme", "column": column, "which": "max"}
+
+    for pattern, aggregate in AGGREGATES:
+        if column and re.search(rf"\b({pattern})\b", text):
+            return {"op": "aggregate", "column": column, "aggregate": aggregate}
+    return None
+
+
+def execute(plan, df):
+    """Run a query plan over the full frame and phrase the exact result."""
+    df = _with_average(df)
+    op = plan["op"]
+    if op == "size":
+        return f"There are {len(df)} students in the dataset."
+
+    column = plan["column"]
+    if column == AVERAGE_COLUMN:
+        label = "overall average"
+    elif column == 'Attendance':
+        label = "attendance"
+    else:
+        label = f"{column} mark"
+    values = df[column]
+
+    if op == "top_k":
+        ranked = df.sort_values(column, ascending=plan["order"] == "asc", kind="stable").head(plan["k"])
+        which = "Top" if plan["order"] == "desc" else "Bottom"
+        lines = [f"- {row['Name']}: {_fmt(row[column])}" for _, row in ranked.iterrows()]
+        return f"{which} {len(ranked)} students by {label}:\n" + "\n".join(lines)
+
+    if op in ("count", "list"):
+        comparator, value = plan["comparator"], plan["value"]
+        mask = {
+            "<": values < value, "<=": values <= value, ">": values > value,
+            ">=": values >= value, "==": values == value,
+        }[comparator]
+        matched = df.loc[mask, 'Name']
+        condition = f"{label} {comparator} {_fmt(value)}"
+        if op == "count":
+            return f"{len(matched)} of {len(df)} students have {condition}."
+        if matched.empty:
+            return f"No students have {condition}."
+        names = ", ".join(str(name) for name in matched.head(MAX_LISTED_STUDENTS))
+        more = f" and {len(matched) - MAX_LISTED_STUDENTS} more" if len(matched) > MAX_LISTED_STUDENTS else ""
+        return f"{len(matched)} students have {condition}: {names}{more}."
+
+    if op == "extreme":
+        target = values.min() if plan["which"] == "min" else values.max()
+        names = ", ".join(str(name) for name in df.loc[values == target, 'Name'].head(MAX_LISTED_STUDENTS))
+        word = "lowest" if plan["which"] == "min" else "highest"
+        return f"The {word} {label} is {_fmt(target)} (Student: {names})."
+
+    if op == "aggregate":
+        result = getattr(values, plan["aggregate"])()
+        word = {"mean": "average", "median": "median", "std": "standard deviation"}[plan["aggregate"]]
+        if column == AVERAGE_COLUMN:
+            return f"The class {word} across all subjects is {_fmt(result)}."
+        return f"The {word} {label} is {_fmt(result)}."
+
+    raise ValueError(f"Unknown query plan: {plan}")
+
+
+def answer_locally(question, df):
+    """Exact answer computed with pandas, or None if the question needs the LLM."""
+    plan = parse_question(question, df)
+    if plan is None:
+        return None
+    return execute(plan, df)
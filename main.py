@@ -6,9 +6,15 @@ from MCQ import MCQ
 from LessonPlan import lessonplan
 from lessonsummarize import summarize
 from wellness import counsellor
+from diagnostics import diagnostics
+import registry
+import telemetry
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+if os.getenv("EDUEASE_WARMUP") == "1":
+    registry.warm_up()
+
 st.set_page_config(
     page_title="Your Smart Teaching Companion",
     page_icon=":teacher:",
@@ -120,18 +126,28 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+# Page tag of each option in the telemetry log
+PAGES = {
+    "🧑‍🏫 Perform Analysis": "analysis",
+    "📝 Generate Quiz": "quiz",
+    "📋 Generate Lesson Plan": "lesson_plan",
+    "📄 Summarize Lesson": "summarize",
+    "💡 Virtual AI Counsellor": "counsellor",
+}
+
 options = st.sidebar.selectbox(
     "How May I Assist?",
-    [
-        "🧑‍🏫 Perform Analysis",
-        "📝 Generate Quiz",
-        "📋 Generate Lesson Plan",
-        "📄 Summarize Lesson",
-        "💡 Virtual AI Counsellor"
-    ]
+    list(PAGES)
 )
 
-if options == "🧑‍🏫 Perform Analysis":
+# Not in the menu: open the app with ?diagnostics=1
+if st.query_params.get("diagnostics") == "1":
+    options = "diagnostics"
+telemetry.set_page(PAGES.get(options, options))
+
+if options == "diagnostics":
+    diagnostics()
+elif options == "🧑‍🏫 Perform Analysis":
     analysis()
 elif options == "📝 Generate Quiz":
     MCQ()
@@ -0,0 +1,53 @@
+from langchain.docstore.document import Document
+from pypdf import PdfReader
+
+EMBED_BATCH_SIZE = 64
+
+
+def iter_pages(stream, source):
+    """
+    Lazily yield one Document per PDF page, reading straight from an in-memory
+    upload buffer. pypdf only parses a page's content when it is accessed.
+    """
+    stream.seek(0)
+    reader = PdfReader(stream)
+    for page_number, page in enumerate(reader.pages):
+        text = page.extract_text() or ""
+        if text.strip():
+            yield Document(page_content=text, metadata={"source": source, "page": page_number})
+
+
+def iter_chunks(pages, splitter):
+    """Split pages one at a time, numbering chunks in document order."""
+    chunk_index = 0
+    for page in pages:
+        for chunk in splitter.split_documents([page]):
+            chunk.metadata["chunk"] = chunk_index
+            chunk_index += 1
+            yield chunk
+
+
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ingest(stream, source, vectordb, splitter, batch_size=EMBED_BATCH_SIZE):
+    """
+    Stream a PDF into a vector store in bounded batches so that at most one
+    batch of chunks is held in memory at a time.
+    Returns the number of chunks and the total bytes of chunk text added.
+    """
+    chunks = 0
+    text_bytes = 0
+    for batch in batched(iter_chunks(iter_pages(stream, source), splitter), batch_size):
+        vectordb.add_documents(batch)
+        chunks += len(batch)
+        text_bytes += sum(len(doc.page_content.encode("utf-8")) for doc in batch)
+    return chunks, text_bytes
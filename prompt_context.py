@@ -0,0 +1,129 @@
+import os
+import re
+from functools import lru_cache
+
+import pandas as pd
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+ENCODING = "cl100k_base"
+# Rows tokenized to estimate the size of a full dump of a large frame
+BASELINE_SAMPLE_ROWS = 500
+SAMPLE_BINS = 10
+KEY_COLUMNS = ['Roll No', 'Name']
+
+
+@lru_cache(maxsize=1)
+def _encoder():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(ENCODING)
+    except Exception:
+        # tiktoken missing or its encoding file cannot be fetched
+        return None
+
+
+def count_tokens(text):
+    """
+    Tokens in `text` according to tiktoken. Gemini's tokenizer differs a little,
+    so this is a budget estimate; without tiktoken it falls back to ~4 chars/token.
+    """
+    encoder = _encoder()
+    if encoder is None:
+        return (len(text) + 3) // 4
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def full_dump_tokens(df):
+    """Tokens of `df.to_string(index=False)`, extrapolated from a sample for large frames."""
+    if len(df) <= BASELINE_SAMPLE_ROWS:
+        return count_tokens(df.to_string(index=False))
+    sample = df.sample(BASELINE_SAMPLE_ROWS, random_state=0)
+    return round(count_tokens(sample.to_string(index=False)) * len(df) / BASELINE_SAMPLE_ROWS)
+
+
+def mentioned_columns(question, df):
+    """Columns named in the question, or every column if it names none."""
+    text = question.lower()
+    columns = [col for col in df.columns if re.search(rf"\b{re.escape(str(col).lower())}\b", text)]
+    return columns or list(df.columns)
+
+
+def aggregates_text(df, columns):
+    numeric = df[columns].select_dtypes(include='number')
+    if numeric.empty:
+        return "No numeric columns."
+    return numeric.describe().round(2).to_string()
+
+
+def stratified_sample(df, by, n):
+    """
+    Up to `n` rows spread across the distribution of `by`: the extremes plus an
+    even draw from each quantile bin, so the sample is not just the top of the file.
+    """
+    if n >= len(df):
+        return df
+    if n <= 0:
+        return df.iloc[0:0]
+    keys = by.rank(method='first')
+    extremes = [keys.idxmin(), keys.idxmax()][:n]
+    rest = df.drop(index=extremes)
+    bins = pd.qcut(keys.drop(index=extremes), q=min(SAMPLE_BINS, len(rest)), labels=False, duplicates='drop')
+    per_bin = max(1, (n - len(extremes)) // max(1, bins.nunique()))
+    picked = rest.groupby(bins, group_keys=False, observed=True).apply(
+        lambda group: group.sample(min(per_bin, len(group)), random_state=0)
+    )
+    sample = pd.concat([df.loc[extremes], picked.head(n - len(extremes))])
+    return sample.sort_index()
+
+
+def build_context(question, df, budget=CONTEXT_TOKEN_BUDGET):
+    """
+    Describe `df` for a prompt within `budget` tokens: exact aggregates of the
+    columns the question mentions, then as many stratified sample rows as fit.
+    Returns the context and a report of tokens used against a full dump.
+    """
+    df = df.reset_index(drop=True)
+    columns = mentioned_columns(question, df)
+    shown = [col for col in KEY_COLUMNS if col in df.columns and col not in columns] + columns
+
+    header = f"Rows: {len(df)}\nColumns: {list(df.columns)}\n"
+    aggregates = f"Exact statistics of the relevant columns (all {len(df)} rows):\n{aggregates_text(df, columns)}\n"
+    used = count_tokens(header + aggregates)
+
+    numeric = df[columns].select_dtypes(include='number')
+    by = numeric.mean(axis=1) if not numeric.empty else pd.Series(range(len(df)), index=df.index)
+
+    def rows_text(n):
+        sample = stratified_sample(df[shown], by, n)
+        if len(sample) == len(df):
+            return "\nAll rows:\n" + sample.to_string(index=False)
+        return f"\nSample of {len(sample)} of {len(df)} rows, spread across the range of values:\n" + sample.to_string(index=False)
+
+    # Largest sample that fits the remaining budget; a row costs several tokens at least
+    low, high = 0, min(len(df), budget // 4)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if used + count_tokens(rows_text(mid)) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    rows = rows_text(low) if low else ""
+
+    context = header + aggregates + rows
+    tokens = count_tokens(context)
+    baseline = full_dump_tokens(df)
+    report = {
+        'tokens': tokens,
+        'budget': budget,
+        'full_dump_tokens': baseline,
+        'saved_ratio': 1 - tokens / baseline if baseline else 0.0,
+        'sample_rows': low,
+        'columns': columns,
+    }
+    return context, report
+
+
+def format_report(report):
+    return (f"Prompt context: {report['tokens']:,} tokens (budget {report['budget']:,}) "
+            f"vs ~{report['full_dump_tokens']:,} for the full table, "
+            f"{report['sample_rows']} sample rows.")
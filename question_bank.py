@@ -0,0 +1,130 @@
+import json
+import os
+import re
+import threading
+import time
+
+import response_cache
+from quiz_dedupe import Deduplicator, normalize
+
+DB_PATH = os.path.join(response_cache.CACHE_DIR, "question_bank.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    topic TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    question TEXT NOT NULL,
+    options TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    created REAL NOT NULL,
+    served INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS questions_text ON questions (topic, difficulty, normalized);
+CREATE INDEX IF NOT EXISTS questions_lookup ON questions (topic, difficulty, served);
+"""
+
+
+def topic_key(topic):
+    """Topics match regardless of case and spacing."""
+    return " ".join(topic.lower().split())
+
+
+def split_question(question):
+    """(text, option lines, answer letter) of a format_quiz question, or None if incomplete."""
+    text = re.sub(r"^Q\d+: ", "", question[0]).strip()
+    options = [line for line in question[1:] if re.match(r"^[a-d]\. ", line)]
+    answers = [line.split(": ", 1)[1].strip() for line in question[1:] if line.startswith("Answer: ")]
+    if not text or len(options) < 2 or not answers:
+        return None
+    return text, options, answers[0]
+
+
+def join_question(text, options, answer, number):
+    return [f"Q{number}: {text}", *options, f"Answer: {answer}"]
+
+
+class QuestionBank:
+    """
+    SQLite store of every generated quiz question, looked up by topic and
+    difficulty. Near-duplicates of a stored question are not added again.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        # Serializes adds so two sessions cannot both insert the same rewording
+        self._write_lock = threading.Lock()
+        # (topic, difficulty) -> Deduplicator of its stored questions, loaded on first add
+        self._dedupers = {}
+        self._connection = response_cache.connect(path, SCHEMA)
+
+    def count(self, topic, difficulty):
+        conn = self._connection()
+        return conn.execute(
+            "SELECT COUNT(*) FROM questions WHERE topic = ? AND difficulty = ?", (topic_key(topic), difficulty)
+        ).fetchone()[0]
+
+    def _deduper(self, conn, topic, difficulty):
+        # Read the stored questions once; later adds update it in memory. Exact
+        # copies written by another process are still caught by the unique index.
+        dedupe = self._dedupers.get((topic, difficulty))
+        if dedupe is None:
+            dedupe = Deduplicator()
+            for (text,) in conn.execute(
+                "SELECT question FROM questions WHERE topic = ? AND difficulty = ?", (topic, difficulty)
+            ):
+                dedupe.add(text)
+            self._dedupers[(topic, difficulty)] = dedupe
+        return dedupe
+
+    def add(self, topic, difficulty, questions):
+        """Store format_quiz questions. Returns the number that were new."""
+        topic = topic_key(topic)
+        with self._write_lock:
+            conn = self._connection()
+            dedupe = self._deduper(conn, topic, difficulty)
+            rows = []
+            now = time.time()
+            for question in questions:
+                parts = split_question(question)
+                if parts is None or not dedupe.add(parts[0]):
+                    continue
+                text, options, answer = parts
+                rows.append((topic, difficulty, text, json.dumps(options), answer, normalize(text), now))
+            if not rows:
+                return 0
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO questions (topic, difficulty, question, options, answer, normalized, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.commit()
+            return conn.total_changes - before
+
+    def draw(self, topic, difficulty, count, start=1):
+        """
+        Up to `count` stored questions, least served first so repeated requests
+        rotate through the bank. Returned as format_quiz lines numbered from `start`.
+        """
+        conn = self._connection()
+        rows = conn.execute(
+            "SELECT id, question, options, answer FROM questions WHERE topic = ? AND difficulty = ? "
+            "ORDER BY served, RANDOM() LIMIT ?",
+            (topic_key(topic), difficulty, count),
+        ).fetchall()
+        if rows:
+            conn.executemany("UPDATE questions SET served = served + 1 WHERE id = ?", [(row[0],) for row in rows])
+            conn.commit()
+        return [
+            join_question(text, json.loads(options), answer, number)
+            for number, (_, text, options, answer) in enumerate(rows, start=start)
+        ]
+
+    def stats(self):
+        conn = self._connection()
+        questions, topics = conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT topic || '|' || difficulty) FROM questions"
+        ).fetchone()
+        return {"questions": questions, "topics": topics}
@@ -0,0 +1,63 @@
+import re
+
+NEAR_DUPLICATE_THRESHOLD = 0.8
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "to", "is", "are", "was", "were", "which", "what",
+    "following", "for", "and", "or", "by", "with", "does", "do", "it", "its", "be", "as", "at",
+}
+
+
+def normalize(text):
+    """Question text without its number, case, punctuation or extra spaces."""
+    text = re.sub(r"^\s*Q\d+\s*[:.)]\s*", "", text)
+    # "power-house" and "powerhouse" are the same word
+    text = re.sub(r"(?<=\w)['’-](?=\w)", "", text.lower())
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def tokens(text):
+    words = normalize(text).split()
+    return frozenset(word for word in words if word not in STOPWORDS) or frozenset(words)
+
+
+def similarity(a, b):
+    """Jaccard similarity of two token sets."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class Deduplicator:
+    """
+    Remembers questions seen so far and rejects exact or near-duplicate
+    rewordings (token overlap at or above `threshold`).
+    """
+
+    def __init__(self, threshold=NEAR_DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._exact = set()
+        self._tokens = []
+        # word -> positions in _tokens, so only overlapping questions are compared
+        self._index = {}
+
+    def is_duplicate(self, text):
+        key = normalize(text)
+        if key in self._exact:
+            return True
+        candidate = tokens(text)
+        positions = set()
+        for word in candidate:
+            positions.update(self._index.get(word, ()))
+        return any(similarity(candidate, self._tokens[i]) >= self.threshold for i in positions)
+
+    def add(self, text):
+        """Remember `text`; False if it duplicates a question already seen."""
+        if self.is_duplicate(text):
+            return False
+        self._exact.add(normalize(text))
+        candidate = tokens(text)
+        for word in candidate:
+            self._index.setdefault(word, []).append(len(self._tokens))
+        self._tokens.append(candidate)
+        return True
@@ -0,0 +1,189 @@
+import json
+import re
+
+OPTION_LETTERS = "abcd"
+JSON_FORMAT = """Respond with a JSON array only. Each element is one question:
+{"question": "...", "options": ["...", "...", "...", "..."], "answer": "a"}
+where "answer" is the letter (a, b, c or d) of the correct option."""
+
+_OPTION_PREFIX = re.compile(r"^\s*\(?[a-dA-D][\).:]\s+")
+_ANSWER_LETTER = re.compile(r"^\(?([a-d])(?:[\).:]|\s|$)")
+
+
+def _clean_option(option):
+    return _OPTION_PREFIX.sub("", str(option)).strip()
+
+
+def _answer_letter(answer, options):
+    if isinstance(answer, int) and not isinstance(answer, bool) and 0 <= answer < len(options):
+        return OPTION_LETTERS[answer]
+    if not isinstance(answer, str):
+        return None
+    text = answer.strip()
+    # JSON_FORMAT asks for a letter, so a bare letter wins over an option that reads the same
+    if text.lower() in OPTION_LETTERS:
+        return text.lower()
+    # the model may name the correct option instead of its letter
+    for letter, option in zip(OPTION_LETTERS, options):
+        if _clean_option(text).lower() == option.lower():
+            return letter
+    text = re.sub(r"^(option|answer)\s*[:\s]\s*", "", text, flags=re.IGNORECASE)
+    match = _ANSWER_LETTER.match(text.lower())
+    return match.group(1) if match else None
+
+
+def to_question(item, number=1):
+    """
+    Validate one decoded item and convert it to format_quiz lines, repairing
+    what can be repaired (option prefixes, options as a dict, the answer given
+    as text or an index). Returns (lines, None) or (None, reason).
+    """
+    if not isinstance(item, dict):
+        return None, "not an object"
+    text = item.get("question") or item.get("q")
+    if not isinstance(text, str) or not text.strip():
+        return None, "missing question"
+    text = re.sub(r"^\s*Q\d+\s*[:.)]\s*", "", text).strip()
+
+    options = item.get("options") or item.get("choices")
+    if isinstance(options, dict):
+        options = [options.get(letter) or options.get(letter.upper()) for letter in OPTION_LETTERS]
+    if not isinstance(options, list) or len(options) != len(OPTION_LETTERS) or not all(options):
+        return None, "needs exactly four options"
+    options = [_clean_option(option) for option in options]
+    if len({option.lower() for option in options}) != len(options) or not all(options):
+        return None, "options are empty or repeated"
+
+    letter = _answer_letter(item.get("answer", item.get("correct")), options)
+    if letter is None:
+        return None, "answer is not one of the options"
+    lines = [f"Q{number}: {text}"]
+    lines += [f"{l}. {option}" for l, option in zip(OPTION_LETTERS, options)]
+    lines.append(f"Answer: {letter}")
+    return lines, None
+
+
+def decode_item(raw):
+    """Parse one item's JSON text, tolerating trailing commas. Returns (lines, None) or (None, reason)."""
+    try:
+        item = json.loads(raw)
+    except ValueError:
+        try:
+            item = json.loads(re.sub(r",\s*([}\]])", r"\1", raw))
+        except ValueError:
+            return None, "invalid JSON"
+    return to_question(item)
+
+
+class QuizStreamParser:
+    """
+    Single-pass parser for a streamed JSON array of questions. `feed` returns
+    every item completed by the new text as (lines, None) or (None, raw text)
+    for items that could not be repaired. A reply wrapped in an object, e.g.
+    {"questions": [...]}, is handled too.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.broken = []
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_depth = None
+        self._start = None
+        self._emitted = 0
+
+    def feed(self, chunk):
+        if self._item_depth is None:
+            # only needed to recover a reply that turns out not to be JSON
+            self.text += chunk
+        self._buffer += chunk
+        buffer = self._buffer
+        items = []
+        for i in range(self._pos, len(buffer)):
+            ch = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "[":
+                self._depth += 1
+            elif ch == "]":
+                self._depth -= 1
+            elif ch == "{":
+                self._depth += 1
+                if self._item_depth is None:
+                    self._item_depth = self._depth
+                elif not self._emitted and self._depth == self._item_depth + 2:
+                    # the first object was a wrapper around the list of questions
+                    self._item_depth = self._depth
+                if self._depth == self._item_depth:
+                    self._start = i
+            elif ch == "}":
+                if self._depth == self._item_depth and self._start is not None:
+                    items.append(self._finish_item(buffer[self._start:i + 1]))
+                    self._start = None
+                self._depth -= 1
+
+        # Keep only the unfinished item so the buffer stays small
+        keep_from = self._start if self._start is not None else len(buffer)
+        self._buffer = buffer[keep_from:]
+        if self._start is not None:
+            self._start = 0
+        self._pos = len(self._buffer)
+        return items
+
+    def _finish_item(self, raw):
+        self._emitted += 1
+        lines, _ = decode_item(raw)
+        if lines is None:
+            self.broken.append(raw)
+            return None, raw
+        return lines, None
+
+    def close(self):
+        """
+        Call once the stream has ended. An item cut off mid-way is added to
+        `broken`. Returns questions recovered from a reply that was not JSON at
+        all (the model fell back to the Q1:/a./Answer: layout).
+        """
+        if self._start is not None and self._buffer.strip():
+            self.broken.append(self._buffer)
+            self._start = None
+        if self._item_depth is None:
+            return format_quiz(self.text)
+        return []
+
+
+def format_quiz(quiz):
+    lines = quiz.split("\n")
+    formatted_quiz = []
+    current_question = []
+
+    for line in lines:
+        if re.match(r"^Q\d+: ", line):
+            if current_question:
+                formatted_quiz.append(current_question)
+            current_question = [line]
+        elif re.match(r"^[a-d]\. ", line):
+            current_question.append(line)
+        elif re.match(r"^Answer: ", line):
+            current_question.append(line)
+    if current_question:
+        formatted_quiz.append(current_question)
+    return formatted_quiz
+
+
+def parse_quiz_json(text):
+    """Questions and broken raw items of a complete (non-streamed) reply."""
+    parser = QuizStreamParser()
+    questions = [lines for lines, _ in parser.feed(text) if lines is not None]
+    questions += parser.close()
+    return questions, parser.broken
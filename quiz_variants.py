@@ -0,0 +1,133 @@
+import random
+import re
+from io import BytesIO
+
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+from quiz_format import OPTION_LETTERS
+from reports import EXPORT_WORKERS, docx_bytes, zip_documents
+
+
+def shuffle_question(question, rng):
+    """One format_quiz question with its options in a new order and the answer letter updated."""
+    options = [re.sub(r"^[a-d]\. ", "", line) for line in question[1:] if re.match(r"^[a-d]\. ", line)]
+    answers = [line.split(": ", 1)[1].strip() for line in question[1:] if line.startswith("Answer: ")]
+    order = list(range(len(options)))
+    rng.shuffle(order)
+    lines = [question[0]] + [f"{OPTION_LETTERS[i]}. {options[old]}" for i, old in enumerate(order)]
+    if answers and answers[0] in OPTION_LETTERS[:len(options)]:
+        lines.append(f"Answer: {OPTION_LETTERS[order.index(OPTION_LETTERS.index(answers[0]))]}")
+    return lines
+
+
+def variant_label(index):
+    """A, B, ..., Z, AA, AB, ..."""
+    label = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        label = chr(ord("A") + remainder) + label
+    return label
+
+
+def make_variants(quiz, count, seed=0, section=""):
+    """
+    `count` variants of a quiz, each with its own question and option order.
+    The same seed and section always give the same variants.
+    Returns (label, questions) pairs; questions are renumbered format_quiz lines.
+    """
+    variants = []
+    for index in range(count):
+        rng = random.Random(f"{seed}|{section}|{index}")
+        questions = list(quiz)
+        rng.shuffle(questions)
+        questions = [shuffle_question(question, rng) for question in questions]
+        questions = [
+            [re.sub(r"^Q\d+: ", f"Q{number}: ", question[0])] + question[1:]
+            for number, question in enumerate(questions, start=1)
+        ]
+        variants.append((variant_label(index), questions))
+    return variants
+
+
+def quiz_template(heading1, heading2):
+    """The shared first part of every quiz document, built once and saved as bytes."""
+    doc = Document()
+
+    heading1_paragraph = doc.add_heading(heading1, level=0)
+    heading1_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    heading2_paragraph = doc.add_heading(heading2, level=2)
+    heading2_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    return docx_bytes(doc)
+
+
+def _from_template(template):
+    # Loading the saved template reuses its headings and styles as they are
+    return Document(BytesIO(template))
+
+
+def quiz_document(template, quiz, subtitle=None):
+    doc = _from_template(template)
+    if subtitle:
+        doc.add_paragraph(subtitle).alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph("Name:")
+    doc.add_paragraph("Roll number:")
+    doc.add_paragraph("Class:")
+    doc.add_paragraph("Section:")
+    doc.add_paragraph("")  # Add space
+
+    for question in quiz:
+        for line in question:
+            if not re.match(r"^Answer: ", line):
+                doc.add_paragraph(line)
+        doc.add_paragraph("")
+    return docx_bytes(doc)
+
+
+def answer_key_document(template, quiz, subtitle):
+    doc = _from_template(template)
+    doc.add_heading(f"Answer Key - {subtitle}", level=2)
+    table = doc.add_table(rows=1, cols=2)
+    table.style = "Table Grid"
+    table.rows[0].cells[0].text = "Question"
+    table.rows[0].cells[1].text = "Answer"
+    for number, question in enumerate(quiz, start=1):
+        answer = next((line.split(": ", 1)[1] for line in question if line.startswith("Answer: ")), "-")
+        cells = table.add_row().cells
+        cells[0].text = str(number)
+        cells[1].text = answer
+    return docx_bytes(doc)
+
+
+def render_variant(job):
+    """
+    Build one variant's quiz and answer key in a worker process.
+    `job` is (template, folder, file stem, subtitle, questions).
+    """
+    template, folder, stem, subtitle, questions = job
+    return [
+        (f"{folder}{stem}.docx", quiz_document(template, questions, subtitle)),
+        (f"{folder}{stem}_answer_key.docx", answer_key_document(template, questions, subtitle)),
+    ]
+
+
+def _safe(name):
+    return re.sub(r"[^\w\-]+", "_", name).strip("_")
+
+
+def export_variants_zip(quiz, heading1, heading2, count, sections=("",), seed=0,
+                        max_workers=EXPORT_WORKERS, on_done=lambda done, total: None):
+    """
+    `count` shuffled variants per section, each with its answer key, rendered
+    across worker processes into a ZIP archive (one folder per named section).
+    """
+    template = quiz_template(heading1, heading2)
+    jobs = []
+    for section in sections:
+        folder = f"{_safe(section)}/" if section else ""
+        for label, questions in make_variants(quiz, count, seed, section):
+            subtitle = f"Section {section}, Variant {label}" if section else f"Variant {label}"
+            jobs.append((template, folder, f"quiz_variant_{label}", subtitle, questions))
+    return zip_documents(render_variant, jobs, max_workers=max_workers, on_done=on_done)
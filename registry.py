@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+
+WELLNESS_PERSIST_DIRECTORY = "wellness_cur/chroma"
+WELLNESS_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+FAKE_EMBEDDINGS = os.getenv("EDUEASE_FAKE_EMBEDDINGS") == "1"
+
+_lock = threading.Lock()
+_key_locks = {}
+_resources = {}
+_stats = {}
+_warm_up_started = False
+
+
+def _rss_bytes():
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss
+    except ImportError:
+        pass
+    try:
+        import resource
+        # ru_maxrss is reported in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return 0
+
+
+def get(key, loader):
+    """
+    Return the process-wide resource stored under `key`, calling `loader` the
+    first time it is requested. Concurrent first requests for the same key
+    wait for a single load; different keys load independently.
+    """
+    if key in _resources:
+        with _lock:
+            _stats[key]["hits"] += 1
+        return _resources[key]
+
+    with _lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    with key_lock:
+        if key in _resources:
+            with _lock:
+                _stats[key]["hits"] += 1
+            return _resources[key]
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        value = loader()
+        load_seconds = time.perf_counter() - start
+        with _lock:
+            _resources[key] = value
+            _stats[key] = {
+                "resource": " / ".join(str(part) for part in key),
+                "load_seconds": round(load_seconds, 3),
+                # RSS growth while loading; approximate if other loads overlap
+                "memory_mb": round(max(_rss_bytes() - rss_before, 0) / (1024 * 1024), 1),
+                "loaded_at": time.time(),
+                "hits": 0,
+            }
+    return value
+
+
+def embeddings(model_name=WELLNESS_EMBEDDING_MODEL):
+    def load():
+        from embedding_scheduler import EmbeddingScheduler, FakeEmbeddings
+        if FAKE_EMBEDDINGS:
+            return EmbeddingScheduler(FakeEmbeddings())
+        from langchain.embeddings import HuggingFaceEmbeddings
+        return EmbeddingScheduler(HuggingFaceEmbeddings(model_name=model_name, model_kwargs={"device": "cpu"}))
+
+    return get(("embeddings", model_name), load)
+
+
+def chroma(persist_directory=WELLNESS_PERSIST_DIRECTORY, embedding_model=WELLNESS_EMBEDDING_MODEL):
+    def load():
+        from langchain.vectorstores import Chroma
+        return Chroma(persist_directory=persist_directory, embedding_function=embeddings(embedding_model))
+
+    return get(("chroma", persist_directory, embedding_model), load)
+
+
+def gemini_model(model_name):
+    def load():
+        import google.generativeai as genai
+        return genai.GenerativeModel(model_name)
+
+    return get(("gemini", model_name), load)
+
+
+def google_embeddings(model_name):
+    def load():
+        if FAKE_EMBEDDINGS:
+            from embedding_scheduler import FakeEmbeddings
+            return FakeEmbeddings(dimensions=768)
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        return GoogleGenerativeAIEmbeddings(model=model_name, google_api_key=os.getenv("GEMINI_API_KEY"))
+
+    return get(("google_embeddings", model_name), load)
+
+
+def warm_up(background=True):
+    """Load the slow shared resources ahead of the first request, once per process."""
+    global _warm_up_started
+    with _lock:
+        if _warm_up_started:
+            return
+        _warm_up_started = True
+
+    def load_all():
+        chroma()
+
+    if background:
+        threading.Thread(target=load_all, name="registry-warm-up", daemon=True).start()
+    else:
+        load_all()
+
+
+def stats():
+    with _lock:
+        return [dict(entry) for entry in _stats.values()]
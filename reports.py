@@ -0,0 +1,178 @@
+import os
+import re
+import tempfile
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+from docx import Document
+from docx.shared import Pt
+from io import BytesIO
+import docx
+
+import telemetry
+from chart_cache import chart_key, charts as chart_cache
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", str(os.cpu_count() or 2)))
+# Spill the archive to disk once it grows past this size
+SPOOL_MAX_BYTES = 32 * 1024 * 1024
+
+
+def plot_performance(subjects, marks, title):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.barplot(x=subjects, y=marks, palette="coolwarm", ax=ax)
+    ax.set_title(title, fontsize=16)
+    ax.set_ylim(0, 100)
+    for p in ax.patches:
+        ax.annotate(f'{p.get_height():.2f}',
+                    (p.get_x() + p.get_width() / 2., p.get_height()),
+                    ha='center', va='center',
+                    xytext=(0, 9),
+                    textcoords='offset points',
+                    fontsize=12)
+    ax.set_xlabel('Subjects', fontsize=14)
+    ax.set_ylabel('Marks', fontsize=14)
+    sns.despine(fig)
+    return fig
+
+
+def plot_attendance(attendance):
+    fig, ax = plt.subplots(figsize=(8, 5))
+    sns.histplot(attendance, bins=10, kde=True, ax=ax)
+    ax.set_title("Attendance Distribution", fontsize=16)
+    ax.set_xlabel("Attendance (%)")
+    ax.set_ylabel("Number of Students")
+    return fig
+
+
+def plot_section_comparison(means):
+    """Grouped bars of subject means, one group per subject and one bar per section."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    means.T.plot(kind='bar', ax=ax, colormap='coolwarm', rot=0)
+    ax.set_title("Subject Averages by Section", fontsize=16)
+    ax.set_ylim(0, 100)
+    ax.set_xlabel('Subjects', fontsize=14)
+    ax.set_ylabel('Average Marks', fontsize=14)
+    ax.legend(title='Section')
+    sns.despine(fig)
+    return fig
+
+
+def section_comparison_chart(means):
+    """PNG bytes of plot_section_comparison for a sections x subjects frame of means."""
+    key = chart_key("sections", list(means.index), list(means.columns), means.to_numpy())
+    return chart_cache.get_or_render(key, lambda: plot_section_comparison(means))
+
+
+def performance_chart(subjects, marks, title):
+    """PNG bytes of plot_performance, rendered once per distinct input."""
+    key = chart_key("performance", list(subjects), list(marks), title)
+    return chart_cache.get_or_render(key, lambda: plot_performance(subjects, marks, title))
+
+
+def attendance_chart(attendance):
+    """PNG bytes of plot_attendance, rendered once per distinct input."""
+    key = chart_key("attendance", attendance)
+    return chart_cache.get_or_render(key, lambda: plot_attendance(attendance))
+
+
+def save_insights_to_docx(title, insights, charts):
+    """`charts` are PNG images as bytes."""
+    doc = Document()
+    doc.add_heading(title, level=1)
+    for insight in insights.split('\n'):
+        if insight.strip():
+            p = doc.add_paragraph(insight.strip(), style='BodyText')
+            for run in p.runs:
+                run.font.size = Pt(12)
+    for chart in charts:
+        doc.add_picture(BytesIO(chart), width=docx.shared.Inches(6))
+    return doc
+
+
+def build_class_docx(avg_marks, strong_subjects, weak_subjects, class_suggestions):
+    class_doc = Document()
+    class_doc.add_heading("Class-wide Performance Insights", level=1)
+    class_doc.add_heading("Subjects Analysis", level=2)
+
+    class_doc.add_heading("Subjects where students are performing well:", level=3)
+    for subject in strong_subjects:
+        p = class_doc.add_paragraph(f"- {subject}: {avg_marks[subject]:.2f}/100", style='BodyText')
+        for run in p.runs:
+            run.font.size = Pt(12)
+
+    class_doc.add_heading("Subjects where students are struggling:", level=3)
+    for subject in weak_subjects:
+        p = class_doc.add_paragraph(f"- {subject}: {avg_marks[subject]:.2f}/100", style='BodyText')
+        for run in p.runs:
+            run.font.size = Pt(12)
+
+    class_doc.add_heading("Overall Class Improvement Plan", level=2)
+    p = class_doc.add_paragraph(class_suggestions, style='BodyText')
+    for run in p.runs:
+        run.font.size = Pt(12)
+    return class_doc
+
+
+def docx_bytes(doc):
+    with telemetry.span("render.docx"):
+        buffer = BytesIO()
+        doc.save(buffer)
+        return buffer.getvalue()
+
+
+def report_filename(roll_no, name):
+    safe_name = re.sub(r"[^\w\-]+", "_", str(name)).strip("_") or "student"
+    return f"{roll_no}_{safe_name}_insights.docx"
+
+
+def render_student_report(job):
+    """
+    Build one student's insights document in a worker process.
+    `job` is (roll_no, name, subjects, marks, attendance, suggestions).
+    """
+    roll_no, name, subjects, marks, attendance, suggestions = job
+    chart = performance_chart(subjects, marks, f"{name}'s Subject-wise Marks")
+    insights = f"Average Score: {sum(marks) / len(marks):.2f}/100\nAttendance: {attendance}%\n{suggestions}"
+    doc = save_insights_to_docx(f"{name}'s Performance Insights", insights, [chart])
+    return report_filename(roll_no, name), docx_bytes(doc)
+
+
+def _student_report_files(job):
+    return [render_student_report(job)]
+
+
+def zip_documents(render, jobs, extra_files=(), max_workers=EXPORT_WORKERS, on_done=lambda done, total: None):
+    """
+    Run `render(job)` for every job across a spawn process pool and write the
+    (filename, bytes) pairs it returns into a ZIP archive as soon as they are
+    ready, so only the documents in flight are held in memory. `render` must be
+    a module-level function. Returns a file object positioned at the start of the archive.
+    """
+    archive = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    chunksize = max(1, len(jobs) // (max_workers * 4))
+    with telemetry.span("render.export_zip", documents=len(jobs)), \
+            zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for filename, content in extra_files:
+            zf.writestr(filename, content)
+        # spawn avoids forking the threaded Streamlit server
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+            for done, files in enumerate(pool.map(render, jobs, chunksize=chunksize), start=1):
+                for filename, content in files:
+                    zf.writestr(filename, content)
+                on_done(done, len(jobs))
+    archive.seek(0)
+    return archive
+
+
+def export_reports_zip(jobs, class_doc=None, max_workers=EXPORT_WORKERS, on_done=lambda done, total: None):
+    """Every student's report, plus the class summary if given, as a ZIP archive."""
+    extra_files = [("class_summary.docx", docx_bytes(class_doc))] if class_doc is not None else []
+    return zip_documents(_student_report_files, jobs, extra_files, max_workers, on_done)
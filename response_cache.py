@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_DIR = os.getenv("EDUEASE_CACHE_DIR", ".eduease_cache")
+DB_PATH = os.path.join(CACHE_DIR, "responses.sqlite3")
+MAX_CACHE_MB = float(os.getenv("RESPONSE_CACHE_MAX_MB", "64"))
+MAX_AGE_DAYS = float(os.getenv("RESPONSE_CACHE_MAX_AGE_DAYS", "30"))
+
+# Only refresh an entry's access time when it is older than this, so that
+# busy read paths do not turn every hit into a write.
+TOUCH_INTERVAL_SECONDS = 60
+EVICT_EVERY_PUTS = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_namespace ON responses (namespace);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+"""
+
+
+def connect(path, schema):
+    """
+    Create the database file and its tables. Returns a function that gives
+    each thread its own WAL connection, so readers never wait on the writer.
+    """
+    local = threading.local()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    def connection():
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            local.conn = conn
+        return conn
+
+    conn = connection()
+    conn.executescript(schema)
+    conn.commit()
+    return connection
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so indentation changes in prompt templates keep their cache entries."""
+    return " ".join(prompt.split())
+
+
+def make_key(model, prompt, params=None):
+    payload = json.dumps([model, normalize_prompt(prompt), params or {}], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed LLM response cache shared by every session and replica that
+    points at the same file. WAL mode lets many readers proceed while one
+    writer inserts.
+    """
+
+    def __init__(self, path=DB_PATH, max_bytes=None, max_age_seconds=None):
+        self.path = path
+        self.max_bytes = MAX_CACHE_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self.max_age_seconds = MAX_AGE_DAYS * 24 * 60 * 60 if max_age_seconds is None else max_age_seconds
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._hits = 0
+        self._misses = 0
+        self._connection = connect(path, SCHEMA)
+
+    def get(self, key):
+        conn = self._connection()
+        row = conn.execute("SELECT response, created, accessed FROM responses WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or now - row[1] > self.max_age_seconds:
+            with self._lock:
+                self._misses += 1
+            return None
+        if now - row[2] > TOUCH_INTERVAL_SECONDS:
+            conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            conn.commit()
+        with self._lock:
+            self._hits += 1
+        return row[0]
+
+    def put(self, key, namespace, model, response):
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, namespace, model, response, size, created, accessed) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, namespace, model, response, len(response.encode("utf-8")), now, now),
+        )
+        conn.commit()
+        with self._lock:
+            self._puts += 1
+            evict_now = self._puts % EVICT_EVERY_PUTS == 0
+        if evict_now:
+            self.evict()
+
+    def invalidate(self, prefix):
+        """Drop every entry whose namespace starts with `prefix`. Returns the number removed."""
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        conn = self._connection()
+        cursor = conn.execute("DELETE FROM responses WHERE namespace LIKE ? ESCAPE '\\'", (escaped + "%",))
+        conn.commit()
+        return cursor.rowcount
+
+    def evict(self):
+        """Remove expired entries, then the least recently used ones until the size cap is met."""
+        conn = self._connection()
+        conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.max_age_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            removed = 0
+            doomed = []
+            for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+                if total - removed <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                removed += size
+            conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        conn.commit()
+
+    def stats(self):
+        conn = self._connection()
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": entries,
+                "size_mb": round(size / (1024 * 1024), 2),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
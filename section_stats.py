@@ -0,0 +1,168 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class RunningStats:
+    """
+    Count, mean, variance, min and max of a stream of values. Two instances
+    can be merged exactly (Chan et al.), so per-section results combine into
+    grade-level results without rereading any data.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        batch = RunningStats()
+        batch.count = int(values.size)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        return self.merge(batch, inplace=True)
+
+    def merge(self, other, inplace=False):
+        result = self if inplace else RunningStats()
+        count = self.count + other.count
+        if count == 0:
+            return result
+        delta = other.mean - self.mean
+        result.mean = self.mean + delta * other.count / count
+        result.m2 = self.m2 + other.m2 + delta ** 2 * self.count * other.count / count
+        result.min = min(self.min, other.min)
+        result.max = max(self.max, other.max)
+        result.count = count
+        return result
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class RunningCovariance:
+    """Mergeable co-moment of two paired streams, enough to recover their correlation."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.c_xy = 0.0
+        self.m2_x = 0.0
+        self.m2_y = 0.0
+
+    def update(self, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        keep = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[keep], y[keep]
+        if x.size == 0:
+            return self
+        batch = RunningCovariance()
+        batch.count = int(x.size)
+        batch.mean_x, batch.mean_y = float(x.mean()), float(y.mean())
+        dx, dy = x - batch.mean_x, y - batch.mean_y
+        batch.c_xy = float((dx * dy).sum())
+        batch.m2_x = float((dx ** 2).sum())
+        batch.m2_y = float((dy ** 2).sum())
+        return self.merge(batch, inplace=True)
+
+    def merge(self, other, inplace=False):
+        result = self if inplace else RunningCovariance()
+        count = self.count + other.count
+        if count == 0:
+            return result
+        dx = other.mean_x - self.mean_x
+        dy = other.mean_y - self.mean_y
+        weight = self.count * other.count / count
+        result.c_xy = self.c_xy + other.c_xy + dx * dy * weight
+        result.m2_x = self.m2_x + other.m2_x + dx ** 2 * weight
+        result.m2_y = self.m2_y + other.m2_y + dy ** 2 * weight
+        result.mean_x = self.mean_x + dx * other.count / count
+        result.mean_y = self.mean_y + dy * other.count / count
+        result.count = count
+        return result
+
+    @property
+    def correlation(self):
+        denominator = math.sqrt(self.m2_x * self.m2_y)
+        return self.c_xy / denominator if denominator else float("nan")
+
+
+class SectionAggregate:
+    """Streaming aggregates of one section (or of several merged sections)."""
+
+    def __init__(self, name):
+        self.name = name
+        self.subjects = {}
+        self.attendance = RunningStats()
+        self.attendance_vs_average = RunningCovariance()
+
+    def update(self, chunk, subjects):
+        for subject in subjects:
+            self.subjects.setdefault(subject, RunningStats()).update(chunk[subject].to_numpy())
+        self.attendance.update(chunk['Attendance'].to_numpy())
+        self.attendance_vs_average.update(chunk['Attendance'].to_numpy(), chunk[subjects].mean(axis=1).to_numpy())
+        return self
+
+    def merge(self, other, name=None):
+        merged = SectionAggregate(name or self.name)
+        for source in (self, other):
+            for subject, stats in source.subjects.items():
+                merged.subjects[subject] = merged.subjects.get(subject, RunningStats()).merge(stats)
+        merged.attendance = self.attendance.merge(other.attendance)
+        merged.attendance_vs_average = self.attendance_vs_average.merge(other.attendance_vs_average)
+        return merged
+
+    @property
+    def students(self):
+        return self.attendance.count
+
+    def summary(self):
+        """One comparison-table row: student count, per-subject mean and spread, attendance."""
+        row = {'Section': self.name, 'Students': self.students}
+        for subject, stats in self.subjects.items():
+            row[f'{subject} Mean'] = stats.mean
+            row[f'{subject} Std'] = stats.std
+            row[f'{subject} Min'] = stats.min
+            row[f'{subject} Max'] = stats.max
+        row['Attendance Mean'] = self.attendance.mean
+        row['Attendance Min'] = self.attendance.min
+        row['Attendance Max'] = self.attendance.max
+        row['Attendance/Marks Correlation'] = self.attendance_vs_average.correlation
+        return row
+
+
+def aggregate_chunks(name, chunks, required_columns):
+    aggregate = SectionAggregate(name)
+    for chunk in chunks:
+        subjects = [col for col in chunk.columns if col not in required_columns]
+        aggregate.update(chunk, subjects)
+    return aggregate
+
+
+def comparison_table(aggregates):
+    """Per-section summary rows followed by the merged grade-level row."""
+    if not aggregates:
+        return pd.DataFrame()
+    total = aggregates[0]
+    for aggregate in aggregates[1:]:
+        total = total.merge(aggregate)
+    rows = [aggregate.summary() for aggregate in aggregates]
+    if len(aggregates) > 1:
+        total.name = 'All Sections'
+        rows.append(total.summary())
+    return pd.DataFrame(rows).set_index('Section')
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Answers keyed by query embedding. A lookup returns the stored answer of the
+    most similar earlier query when its cosine similarity reaches `threshold`.
+    Entries expire after `ttl_seconds` and the least recently used entry is
+    dropped once `capacity` is exceeded.
+    """
+
+    def __init__(self, threshold=0.92, ttl_seconds=24 * 60 * 60, capacity=512):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._next_id = 0
+        self._hits = 0
+        self._misses = 0
+        self._miss_seconds = 0.0
+        self._saved_seconds = 0.0
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self, now):
+        expired = [key for key, entry in self._entries.items() if now - entry["created"] > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+
+    def lookup(self, vector):
+        """Return (answer, similarity) for the closest cached query, or (None, best similarity)."""
+        query = self._normalize(vector)
+        with self._lock:
+            self._expire(time.time())
+            best_key, best_similarity = None, 0.0
+            if self._entries:
+                keys = list(self._entries)
+                matrix = np.stack([self._entries[key]["vector"] for key in keys])
+                similarities = matrix @ query
+                best = int(np.argmax(similarities))
+                best_key, best_similarity = keys[best], float(similarities[best])
+
+            if best_key is not None and best_similarity >= self.threshold:
+                self._entries.move_to_end(best_key)
+                self._hits += 1
+                if self._misses:
+                    self._saved_seconds += self._miss_seconds / self._misses
+                return self._entries[best_key]["answer"], best_similarity
+
+            self._misses += 1
+            return None, best_similarity
+
+    def store(self, vector, answer, latency_seconds=0.0):
+        """Cache an answer computed after a miss, along with how long it took to produce."""
+        with self._lock:
+            self._entries[self._next_id] = {
+                "vector": self._normalize(vector),
+                "answer": answer,
+                "created": time.time(),
+            }
+            self._next_id += 1
+            self._miss_seconds += latency_seconds
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "threshold": self.threshold,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else 0.0,
+                "saved_seconds": round(self._saved_seconds, 2),
+            }
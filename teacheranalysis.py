@@ -1,36 +1,52 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import google.generativeai as genai
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import gemini_client
+import telemetry
 
-from docx import Document
-from docx.shared import Pt
 from io import BytesIO
-import docx
 from animations import display_cards
+from cohort_stats import CohortStats, attendance_summary
+from dataset_io import REQUIRED_COLUMNS, SECTIONS_DIR, DatasetError, SectionSource, iter_chunks, read_dataset
+from section_stats import aggregate_chunks, comparison_table
+from local_query import answer_locally
+from prompt_context import build_context, format_report
+from reports import (
+    DOCX_MIME, attendance_chart, build_class_docx, export_reports_zip, performance_chart, save_insights_to_docx,
+    section_comparison_chart
+)
+
+if not gemini_client.is_configured():
+    raise ValueError("❌ GEMINI_API_KEY not found in .env file")
 
-import os
-from dotenv import load_dotenv
+STUDENT_SUGGESTIONS = "teacheranalysis.student"
+CLASS_SUGGESTIONS = "teacheranalysis.class"
+SUBJECT_SUGGESTIONS = "teacheranalysis.subject"
 
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+SUGGESTION_BATCH_SIZE = 8
+SUGGESTION_CONCURRENCY = 4
 
-if not GEMINI_API_KEY:
-    raise ValueError("❌ GEMINI_API_KEY not found in .env file")
 
-# Configure Gemini API
-genai.configure(api_key=GEMINI_API_KEY)
+def _dataset_entry(source):
+    datasets = st.session_state.setdefault('datasets', {})
+    if source.signature not in datasets:
+        df, report = read_dataset(source.open(), source.name)
+        datasets[source.signature] = {'df': df, 'report': report, 'cohort': None}
+    return datasets[source.signature]
 
 
-@st.cache_data
-def load_data(file):
-    return pd.read_csv(file)
+def load_data(source):
+    """
+    Read a section's dataset once per file and keep it in session state, so
+    reruns neither re-read nor hash the frame.
+    """
+    entry = _dataset_entry(source)
+    return entry['df'], entry['report']
 
 
-@st.cache_data
-def get_suggestions(student_name, marks_data, attendance_data):
-    prompt = f"""
+def _suggestion_prompt(student_name, marks_data, attendance_data):
+    return f"""
     Student Name: {student_name}
     Subject Marks: {marks_data}
     Attendance: {attendance_data}%
@@ -44,14 +60,92 @@ def get_suggestions(student_name, marks_data, attendance_data):
     - Suggest ways to maintain or boost motivation
     Max 4 bullet points.
     """
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    response = model.generate_content(prompt)
-    return response.text.strip() if response and hasattr(response, 'text') else "No suggestions generated."
 
 
-@st.cache_data
-def get_class_suggestions(subject_avgs):
+def _scalar(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+def student_inputs(student_data, subjects):
+    """(name, marks, attendance) of one student row, as plain Python values for prompting."""
+    marks = {subject: _scalar(student_data[subject]) for subject in subjects}
+    return student_data['Name'], marks, _scalar(student_data['Attendance'])
+
+
+def get_suggestions(student_name, marks_data, attendance_data):
+    prompt = _suggestion_prompt(student_name, marks_data, attendance_data)
+    return gemini_client.generate(prompt, policy="fast", cache_namespace=STUDENT_SUGGESTIONS) or "No suggestions generated."
+
+
+def _batch_suggestions(batch):
+    """Ask for several students' suggestions in one call and cache each one under its single-student prompt."""
+    students = "\n".join(
+        f"{i}. Student Name: {name} | Subject Marks: {marks} | Attendance: {attendance}%"
+        for i, (name, marks, attendance) in enumerate(batch)
+    )
     prompt = f"""
+    As a teacher, provide personalized suggestions for each of the following students to improve their performance
+    (max 100 words and max 4 bullet points per student):
+    - Identify strengths and weaknesses based on subject marks
+    - Appreciate for subjects the student performed well
+    - Recommend subject-specific study strategies where the student is weak
+    - Address attendance issues if present
+    - Suggestions must be specific to the student's performance
+    - Suggest ways to maintain or boost motivation
+
+    Students:
+    {students}
+
+    Respond with a JSON list with one object per student: {{"id": <student number>, "suggestions": "<bullet points as markdown>"}}
+    """
+    text = gemini_client.generate(prompt, policy="fast", generation_config=gemini_client.JSON_GENERATION_CONFIG)
+    try:
+        items = json.loads(text)
+    except json.JSONDecodeError:
+        return 0
+
+    stored = 0
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        index, suggestions = item.get("id"), item.get("suggestions")
+        if isinstance(index, int) and 0 <= index < len(batch) and isinstance(suggestions, str) and suggestions.strip():
+            gemini_client.cache_store(STUDENT_SUGGESTIONS, _suggestion_prompt(*batch[index]), suggestions.strip(), policy="fast")
+            stored += 1
+    return stored
+
+
+def get_class_batch_suggestions(students, batch_size=SUGGESTION_BATCH_SIZE, concurrency=SUGGESTION_CONCURRENCY, on_done=lambda done, total: None):
+    """
+    Fill the suggestion cache for a whole class, several students per prompt and
+    a few prompts at a time. Students whose suggestions are already cached are
+    skipped; any a batch fails to cover fall back to one call when browsed.
+    A batch that raises (e.g. once rate-limit fallbacks run out) counts as none
+    stored. Returns the number of students whose suggestions were generated
+    and the errors of the failed batches.
+    """
+    pending = [s for s in students if gemini_client.cache_lookup(_suggestion_prompt(*s), policy="fast") is None]
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    generated = 0
+    errors = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(telemetry.bind(_batch_suggestions), batch) for batch in batches]
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                generated += future.result()
+            except Exception as e:
+                errors.append(e)
+            on_done(done, len(futures))
+    return generated, errors
+
+
+def cached_suggestions(student_name, marks_data, attendance_data):
+    """Suggestions already in the response cache, without calling the model."""
+    return gemini_client.cache_lookup(_suggestion_prompt(student_name, marks_data, attendance_data), policy="fast")
+
+
+def _class_suggestion_prompt(subject_avgs):
+    return f"""
     Class Subject Averages: {subject_avgs}
 
     As a teacher, provide brief suggestions to improve overall class performance (max 50 words and in bullet points not more than 3):
@@ -60,123 +154,132 @@ def get_class_suggestions(subject_avgs):
     - Suggest activities or resources to help students understand difficult concepts
     - Provide general tips to maintain or boost class motivation
     """
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    response = model.generate_content(prompt)
-    return response.text.strip() if response and hasattr(response, "text") else "No suggestions generated."
-
-
-def calculate_performance(marks):
-    return sum(marks) / len(marks)
-
-
-def plot_performance(subjects, marks, title):
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.barplot(x=subjects, y=marks, palette="coolwarm", ax=ax)
-    ax.set_title(title, fontsize=16)
-    ax.set_ylim(0, 100)
-    for p in ax.patches:
-        ax.annotate(f'{p.get_height():.2f}', 
-                    (p.get_x() + p.get_width() / 2., p.get_height()),
-                    ha='center', va='center', 
-                    xytext=(0, 9), 
-                    textcoords='offset points', 
-                    fontsize=12)
-    ax.set_xlabel('Subjects', fontsize=14)
-    ax.set_ylabel('Marks', fontsize=14)
-    sns.despine(fig)
-    return fig
-
-
-def analyze_subject_performance(df, subjects):
-    weak_subjects = []
-    strong_subjects = []
-    avg_marks = df[subjects].mean()
-    for subject in subjects:
-        if avg_marks[subject] < 60:
-            weak_subjects.append(subject)
-        else:
-            strong_subjects.append(subject)
-    return weak_subjects, strong_subjects, avg_marks
-
-
-@st.cache_data
+
+
+def get_class_suggestions(subject_avgs):
+    prompt = _class_suggestion_prompt(subject_avgs)
+    return gemini_client.generate(prompt, policy="fast", cache_namespace=CLASS_SUGGESTIONS) or "No suggestions generated."
+
+
+def cached_class_suggestions(subject_avgs):
+    """Class suggestions already in the response cache, without calling the model."""
+    return gemini_client.cache_lookup(_class_suggestion_prompt(subject_avgs), policy="fast")
+
+
 def get_subject_suggestions(subject):
     prompt = f"""
     The class is struggling in {subject}. Provide brief strategies to help students improve in this subject (50 words max) in max 3 bullet points.
     """
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    response = model.generate_content(prompt)
-    return response.text.strip() if response and hasattr(response, "text") else "No suggestions generated."
+    return gemini_client.generate(prompt, policy="fast", cache_namespace=SUBJECT_SUGGESTIONS) or "No suggestions generated."
 
 
-def attendance_insights(df):
-    avg_attendance = df['Attendance'].mean()
-    min_attendance = df['Attendance'].min()
-    max_attendance = df['Attendance'].max()
-    avg_marks = df[[col for col in df.columns if col not in ['Roll No', 'Name', 'Attendance']]].mean(axis=1)
-    correlation = df['Attendance'].corr(avg_marks)
+def format_attendance_insights(summary):
+    correlation = summary['correlation']
     if correlation > 0.5:
         attendance_impact = "Low attendance is significantly impacting performance. Ensure regular attendance."
     elif correlation > 0:
         attendance_impact = "Attendance is moderately impacting performance. Try to attend more regularly."
     else:
         attendance_impact = "Attendance is not a major issue for performance. Focus on study habits."
-    lowest_attendance_student = df[df['Attendance'] == min_attendance]['Name'].values[0]
-    highest_attendance_student = df[df['Attendance'] == max_attendance]['Name'].values[0]
     insights = f"""
-    - Average Attendance: {avg_attendance:.2f}%
-    - Lowest Attendance: {min_attendance}% (Student: {lowest_attendance_student})
-    - Highest Attendance: {max_attendance}% (Student: {highest_attendance_student})
+    - Average Attendance: {summary['average']:.2f}%
+    - Lowest Attendance: {summary['min']}% (Student: {summary['lowest_student']})
+    - Highest Attendance: {summary['max']}% (Student: {summary['highest_student']})
     - Insights: {attendance_impact}
     """
     return insights
 
 
-def save_insights_to_docx(title, insights, charts):
-    doc = Document()
-    doc.add_heading(title, level=1)
-    for insight in insights.split('\n'):
-        if insight.strip():
-            p = doc.add_paragraph(insight.strip(), style='BodyText')
-            for run in p.runs:
-                run.font.size = Pt(12)
-    for chart in charts:
-        image_stream = BytesIO()
-        chart.savefig(image_stream, format='png')
-        image_stream.seek(0)
-        doc.add_picture(image_stream, width=docx.shared.Inches(6))
-    return doc
+def attendance_insights(df):
+    subjects = [col for col in df.columns if col not in ['Roll No', 'Name', 'Attendance']]
+    return format_attendance_insights(attendance_summary(df, subjects))
+
+
+def get_cohort(source, df, subjects):
+    """Per-student and per-subject statistics, computed once per dataset."""
+    entry = _dataset_entry(source)
+    if entry['cohort'] is None:
+        entry['cohort'] = CohortStats(df, subjects)
+    return entry['cohort']
 
 
-def query_gemini(question: str, df: pd.DataFrame) -> str:
+def get_section_aggregates(sources):
     """
-    Build a concise dataset summary and ask Gemini the question.
-    We intentionally include only a short summary + first 10 rows to keep prompts small.
+    Streaming aggregates per section. Each file is scanned once; adding a
+    section only reads the new file.
     """
+    cache = st.session_state.setdefault('section_aggregates', {})
+    aggregates = []
+    for source in sources:
+        if source.signature not in cache:
+            cache[source.signature] = aggregate_chunks(source.name, iter_chunks(source.open(), source.name), REQUIRED_COLUMNS)
+        aggregates.append(cache[source.signature])
+    return aggregates
+
+
+def section_insights(table, subjects):
+    lines = []
+    for section, row in table.iterrows():
+        means = {subject: row[f'{subject} Mean'] for subject in subjects if pd.notna(row.get(f'{subject} Mean'))}
+        strongest = max(means, key=means.get) if means else "-"
+        weakest = min(means, key=means.get) if means else "-"
+        lines.append(
+            f"- {section}: {int(row['Students'])} students, average attendance {row['Attendance Mean']:.2f}%, "
+            f"strongest subject {strongest}, weakest subject {weakest}"
+        )
+    return "\n".join(lines)
+
+
+def section_comparison(sources):
+    st.markdown("<h1 style='font-size:30px;font-family:Garamond,serif;'>Section Comparison</h1>", unsafe_allow_html=True)
+    try:
+        aggregates = get_section_aggregates(sources)
+    except DatasetError as e:
+        st.error(str(e))
+        return
+
+    table = comparison_table(aggregates)
+    subjects = list(dict.fromkeys(subject for aggregate in aggregates for subject in aggregate.subjects))
+    st.dataframe(table.round(2))
+
+    means = table[[f'{subject} Mean' for subject in subjects]]
+    means.columns = subjects
+    chart = section_comparison_chart(means.drop(index='All Sections', errors='ignore'))
+    st.image(chart)
+
+    insights = section_insights(table, subjects)
+    st.write(insights)
+
+    st.download_button(
+        label="Download Section Comparison (CSV)",
+        data=table.round(2).to_csv().encode('utf-8'),
+        file_name="section_comparison.csv",
+        mime="text/csv"
+    )
+    doc = save_insights_to_docx("Section Comparison", insights, [chart])
+    buffer = BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    st.download_button(
+        label="Download Section Comparison Insights",
+        data=buffer,
+        file_name="section_comparison.docx",
+        mime=DOCX_MIME
+    )
 
-    n_rows = len(df)
-    columns = df.columns.tolist()
-
-    numeric_df = df.select_dtypes(include=['number'])
-    if not numeric_df.empty:
-        numeric_summary = numeric_df.describe().round(2).to_string()
-    else:
-        numeric_summary = "No numeric columns."
 
-    head = df.head(10).to_string(index=False)
+def query_gemini(question: str, df: pd.DataFrame):
+    """
+    Ask Gemini the question with a token-budgeted description of the dataset:
+    exact statistics of the relevant columns plus a stratified sample of rows.
+    Returns the answer and the context report.
+    """
+    context, report = build_context(question, df)
 
     prompt = f"""
 You are a helpful assistant that answers questions about the dataset provided.
 
-Dataset summary:
-- Rows: {n_rows}
-- Columns: {columns}
-
-Numeric summary (statistics for numeric columns):
-{numeric_summary}
-
-First up to 10 rows of the table:
-{head}
+{context}
 
 Question:
 {question}
@@ -184,62 +287,125 @@ Question:
 Answer concisely, cite column names or row examples where relevant. If the question cannot be answered from the dataset, say you don't have enough information.
 """
     try:
-        model = genai.GenerativeModel("gemini-2.0-flash")
-        response = model.generate_content(prompt)
-        return response.text.strip() if response and hasattr(response, "text") else "No answer generated."
+        return gemini_client.generate(prompt, policy="fast") or "No answer generated.", report
     except Exception as e:
-        return f"Error when calling Gemini: {e}"
+        return f"Error when calling Gemini: {e}", report
 
 
 def analysis():
-    uploaded_file = st.file_uploader("Upload CSV file with student data", type="csv")
+    uploaded_files = st.file_uploader(
+        "Upload CSV or Parquet files with student data (one file per section)",
+        type=["csv", "parquet"],
+        accept_multiple_files=True
+    )
+    section_folder = None
+    if SECTIONS_DIR:
+        section_folder = st.sidebar.text_input(f"Or read every section file in a folder under {SECTIONS_DIR}:")
     analysis_type = st.sidebar.radio(
         "Choose Analysis Type:",
-        ["Class Wide Performance Analysis", "Student Wise Performance Analysis", "Attendance Analysis", "Ask Questions To The Data"],
+        ["Class Wide Performance Analysis", "Student Wise Performance Analysis", "Attendance Analysis", "Section Comparison", "Ask Questions To The Data"],
         horizontal=False
     )
 
-    if uploaded_file is not None:
-        df = load_data(uploaded_file)
-        required_columns = ['Roll No', 'Name', 'Attendance']
+    sources = [SectionSource.from_upload(uploaded_file) for uploaded_file in uploaded_files or []]
+    if section_folder:
+        try:
+            sources += SectionSource.from_directory(section_folder)
+        except DatasetError as e:
+            st.error(str(e))
+        except OSError as e:
+            st.error(f"Could not read the folder: {e}")
+
+    if sources:
+        if analysis_type == "Section Comparison":
+            section_comparison(sources)
+            return
+
+        source = sources[0]
+        if len(sources) > 1:
+            selected = st.selectbox("Section to analyze:", range(len(sources)), format_func=lambda i: sources[i].name)
+            source = sources[selected]
 
-        if not all(col in df.columns for col in required_columns):
-            st.error("CSV file must contain 'Roll No', 'Name', and 'Attendance' columns.")
+        try:
+            df, report = load_data(source)
+        except DatasetError as e:
+            st.error(str(e))
             return
+        st.caption(
+            f"Loaded {report['rows']:,} rows using {report['bytes_after'] / 1024 ** 2:.1f} MB "
+            f"({report['saved_ratio']:.0%} less memory than default types)"
+        )
 
-        subjects = [col for col in df.columns if col not in required_columns]
+        subjects = [col for col in df.columns if col not in REQUIRED_COLUMNS]
+        cohort = get_cohort(source, df, subjects)
 
         if analysis_type == "Student Wise Performance Analysis":
             st.markdown("<h1 style='font-size:30px;font-family:Garamond,serif;'>Student-wise Analysis</h1>", unsafe_allow_html=True)
-            student_names = df['Name'].unique()
+            student_names = cohort.names
+
+            if st.button("Generate suggestions for the whole class"):
+                students = [student_inputs(row, subjects) for _, row in cohort.students.iterrows()]
+                progress = st.progress(0.0, text="Generating suggestions for the class...")
+                generated, errors = get_class_batch_suggestions(
+                    students,
+                    on_done=lambda done, total: progress.progress(done / total, text=f"Finished {done} of {total} batches")
+                )
+                progress.empty()
+                if errors:
+                    st.warning(
+                        f"Suggestions ready for {generated} more students; {len(errors)} batch(es) failed "
+                        f"({errors[0]}). Those students get suggestions when opened individually."
+                    )
+                else:
+                    st.success(f"Suggestions ready for {generated} more students.")
+
+            if st.button("Prepare reports for all students"):
+                jobs = []
+                # Every row, not every name: students may share a name (the file name has the roll number)
+                for _, row in cohort.students.iterrows():
+                    name, student_marks, student_attendance = student_inputs(row, subjects)
+                    suggestions = cached_suggestions(name, student_marks, student_attendance) or \
+                        "Personalized suggestions have not been generated for this student yet."
+                    jobs.append((row['Roll No'], name, subjects, list(student_marks.values()), student_attendance, suggestions))
+
+                avg_marks = cohort.subject_stats['mean']
+                class_suggestions = cached_class_suggestions(avg_marks.to_dict()) or \
+                    "Class suggestions have not been generated yet."
+                class_doc = build_class_docx(avg_marks, cohort.strong_subjects, cohort.weak_subjects, class_suggestions)
+                progress = st.progress(0.0, text="Rendering student reports...")
+                st.session_state['reports_zip'] = export_reports_zip(
+                    jobs,
+                    class_doc,
+                    on_done=lambda done, total: progress.progress(done / total, text=f"Rendered {done} of {total} reports")
+                )
+                progress.empty()
+
+            if 'reports_zip' in st.session_state:
+                archive = st.session_state['reports_zip']
+                archive.seek(0)
+                st.download_button(
+                    label="Download All Student Reports (ZIP)",
+                    data=archive.read(),
+                    file_name="student_reports.zip",
+                    mime="application/zip"
+                )
+
             selected_student = st.selectbox("Select a student to analyze:", student_names)
 
-            student_data = df[df['Name'] == selected_student].iloc[0]
-            marks = {subject: student_data[subject] for subject in subjects}
-            attendance = student_data['Attendance']
-            overall_score = calculate_performance(list(marks.values()))
+            student_data = cohort.student(selected_student)
+            _, marks, attendance = student_inputs(student_data, subjects)
 
             st.markdown(f"<h1 style='font-size:30px;font-family:Garamond,serif;'>{selected_student}'s Performance</h1>", unsafe_allow_html=True)
-            st.write(f"Average Score: {overall_score:.2f}/100")
+            st.write(f"Average Score: {student_data['Average']:.2f}/100")
+            st.write(f"Class Rank: {student_data['Rank']} of {len(cohort.students)} (percentile {student_data['Percentile']:.0f})")
             st.write(f"Attendance: {attendance}%")
 
-            fig = plot_performance(subjects, list(marks.values()), f"{selected_student}'s Subject-wise Marks")
-            st.pyplot(fig)
-
-            categories = {
-                'Excellent': 90,
-                'Good': 80,
-                'Needs Improvement': 60,
-                'Concerning': 40,
-                'Failed': 0
-            }
+            chart = performance_chart(subjects, list(marks.values()), f"{selected_student}'s Subject-wise Marks")
+            st.image(chart)
 
             st.markdown("<h1 style='font-size:30px;font-family:Garamond,serif;'>Subject-wise Status</h1>", unsafe_allow_html=True)
             for subject, mark in marks.items():
-                for cat, threshold in categories.items():
-                    if mark >= threshold:
-                        st.write(f"{subject}: {cat} ({mark}/100)")
-                        break
+                st.write(f"{subject}: {student_data[f'{subject} Band']} ({mark}/100)")
 
             if attendance < 50:
                 st.error("🚨 CRITICAL WARNING: Attendance is dangerously low. Immediate action is required.")
@@ -250,7 +416,7 @@ def analysis():
             suggestions = get_suggestions(selected_student, marks, attendance)
             st.write(suggestions)
 
-            charts = [fig]
+            charts = [chart]
             doc = save_insights_to_docx(f"{selected_student}'s Performance Insights", suggestions, charts)
             buffer = BytesIO()
             doc.save(buffer)
@@ -259,14 +425,14 @@ def analysis():
                 label="Download Student Insights",
                 data=buffer,
                 file_name=f"{selected_student}_insights.docx",
-                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                mime=DOCX_MIME
             )
 
         elif analysis_type == "Class Wide Performance Analysis":
             st.markdown("<h1 style='font-size:30px;font-family:Garamond,serif;'>Class-wide Analysis</h1>", unsafe_allow_html=True)
 
-            class_avg = df[subjects].mean().mean()
-            weak_subjects, strong_subjects, avg_marks = analyze_subject_performance(df, subjects)
+            weak_subjects, strong_subjects = cohort.weak_subjects, cohort.strong_subjects
+            avg_marks = cohort.subject_stats['mean']
 
             st.markdown("<h1 style='font-size:30px;font-family:Garamond,serif;'>Subjects Analysis</h1>", unsafe_allow_html=True)
             st.write("Subjects where students are performing well:")
@@ -277,12 +443,11 @@ def analysis():
             for subject in weak_subjects:
                 st.write(f"- {subject}: {avg_marks[subject]:.2f}/100")
 
-            avg_marks_series = df[subjects].mean()
-            highest_marks = df[subjects].max()
-            lowest_marks = df[subjects].min()
-
             try:
-                display_cards("Class Subject Performance", avg_marks_series.mean(), highest_marks.max(), lowest_marks.min())
+                display_cards(
+                    "Class Subject Performance",
+                    avg_marks.mean(), cohort.subject_stats['max'].max(), cohort.subject_stats['min'].min()
+                )
             except Exception:
                 pass
 
@@ -299,26 +464,7 @@ def analysis():
             class_suggestions = get_class_suggestions(avg_marks.to_dict())
             st.write(class_suggestions)
 
-            class_doc = Document()
-            class_doc.add_heading("Class-wide Performance Insights", level=1)
-            class_doc.add_heading("Subjects Analysis", level=2)
-
-            class_doc.add_heading("Subjects where students are performing well:", level=3)
-            for subject in strong_subjects:
-                p = class_doc.add_paragraph(f"- {subject}: {avg_marks[subject]:.2f}/100", style='BodyText')
-                for run in p.runs:
-                    run.font.size = Pt(12)
-
-            class_doc.add_heading("Subjects where students are struggling:", level=3)
-            for subject in weak_subjects:
-                p = class_doc.add_paragraph(f"- {subject}: {avg_marks[subject]:.2f}/100", style='BodyText')
-                for run in p.runs:
-                    run.font.size = Pt(12)
-
-            class_doc.add_heading("Overall Class Improvement Plan", level=2)
-            p = class_doc.add_paragraph(class_suggestions, style='BodyText')
-            for run in p.runs:
-                run.font.size = Pt(12)
+            class_doc = build_class_docx(avg_marks, strong_subjects, weak_subjects, class_suggestions)
 
             buffer = BytesIO()
             class_doc.save(buffer)
@@ -327,22 +473,18 @@ def analysis():
                 label="Download Class Insights",
                 data=buffer,
                 file_name="class_insights.docx",
-                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                mime=DOCX_MIME
             )
 
         elif analysis_type == "Attendance Analysis":
             st.markdown("<h1 style='font-size:30px;font-family:Garamond,serif;'>Attendance Analysis</h1>", unsafe_allow_html=True)
-            attendance_report = attendance_insights(df)
+            attendance_report = format_attendance_insights(cohort.attendance)
             st.write(attendance_report)
 
-            fig, ax = plt.subplots(figsize=(8, 5))
-            sns.histplot(df['Attendance'], bins=10, kde=True, ax=ax)
-            ax.set_title("Attendance Distribution", fontsize=16)
-            ax.set_xlabel("Attendance (%)")
-            ax.set_ylabel("Number of Students")
-            st.pyplot(fig)
+            chart = attendance_chart(df['Attendance'])
+            st.image(chart)
 
-            charts = [fig]
+            charts = [chart]
             doc = save_insights_to_docx("Attendance Analysis", attendance_report, charts)
             buffer = BytesIO()
             doc.save(buffer)
@@ -351,7 +493,7 @@ def analysis():
                 label="Download Attendance Insights",
                 data=buffer,
                 file_name="attendance_insights.docx",
-                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                mime=DOCX_MIME
             )
 
         elif analysis_type == "Ask Questions To The Data":
@@ -363,13 +505,19 @@ def analysis():
                 if not question.strip():
                     st.warning("Please type a question before clicking 'Get Answer'.")
                 else:
-                    with st.spinner("Querying Gemini..."):
-                        answer = query_gemini(question, df)
-                    st.success("Answer from Gemini:")
-                    st.write(answer)
+                    answer = answer_locally(question, df)
+                    if answer is not None:
+                        st.success("Answer computed from the full dataset:")
+                        st.write(answer)
+                    else:
+                        with st.spinner("Querying Gemini..."):
+                            answer, report = query_gemini(question, df)
+                        st.success("Answer from Gemini:")
+                        st.write(answer)
+                        st.caption(format_report(report))
 
     else:
-        st.info("Please upload a CSV file with the required columns: Roll No, Name, Attendance, and at least one subject column.")
+        st.info("Please upload one or more CSV files with the required columns: Roll No, Name, Attendance, and at least one subject column.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+import response_cache
+
+TELEMETRY_ENABLED = os.getenv("EDUEASE_TELEMETRY", "1") != "0"
+TELEMETRY_PATH = os.getenv("EDUEASE_TELEMETRY_PATH", os.path.join(response_cache.CACHE_DIR, "telemetry.jsonl"))
+# The log is moved to TELEMETRY_PATH + ".1" once it reaches this size, replacing the previous one
+TELEMETRY_MAX_BYTES = int(float(os.getenv("EDUEASE_TELEMETRY_MAX_MB", "10")) * 1024 * 1024)
+# Most recent spans of this process, for the diagnostics page
+RECENT_SPANS = 5000
+
+_page = contextvars.ContextVar("telemetry_page", default=None)
+_lock = threading.Lock()
+_file = None
+_recent = deque(maxlen=RECENT_SPANS)
+
+
+def set_page(page):
+    """Tag every span recorded by the current script run with `page`."""
+    _page.set(page)
+
+
+def bind(fn):
+    """
+    `fn` to run in a worker thread with the caller's page tag, since thread
+    pools do not inherit context variables.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+def _rotated(path):
+    return path + ".1"
+
+
+def _is_current(file):
+    # Another process may have rotated the log since this one opened it
+    try:
+        return os.stat(TELEMETRY_PATH).st_ino == os.fstat(file.fileno()).st_ino
+    except FileNotFoundError:
+        return False
+
+
+def _write(record):
+    global _file
+    with _lock:
+        _recent.append(record)
+        if _file is not None and not _is_current(_file):
+            _file.close()
+            _file = None
+        if _file is None:
+            os.makedirs(os.path.dirname(TELEMETRY_PATH) or ".", exist_ok=True)
+            _file = open(TELEMETRY_PATH, "a", encoding="utf-8")
+        _file.write(json.dumps(record, default=str) + "\n")
+        _file.flush()
+        if _file.tell() >= TELEMETRY_MAX_BYTES:
+            _file.close()
+            _file = None
+            os.replace(TELEMETRY_PATH, _rotated(TELEMETRY_PATH))
+
+
+def record(stage, seconds, ok=True, **fields):
+    """Record one already-timed operation. `fields` are tags such as model, tokens or cache_hit."""
+    if not TELEMETRY_ENABLED:
+        return
+    entry = {
+        "time": time.time(),
+        "stage": stage,
+        "page": _page.get(),
+        "seconds": round(seconds, 4),
+        "ok": ok,
+        "pid": os.getpid(),
+    }
+    entry.update({key: value for key, value in fields.items() if value is not None})
+    try:
+        _write(entry)
+    except OSError:
+        # telemetry must never break the page it measures
+        pass
+
+
+def _cancelled(error):
+    """
+    A consumer closing a stream early, or Streamlit stopping or rerunning the
+    script when the user interacts, is not a failure of the measured stage.
+    """
+    return isinstance(error, GeneratorExit) or any(
+        cls.__name__ == "ScriptControlException" for cls in type(error).__mro__
+    )
+
+
+@contextmanager
+def span(stage, **fields):
+    """
+    Time the enclosed block. The yielded dict can be updated with tags that are
+    only known inside the block, e.g. the model that answered or a token count.
+    """
+    tags = dict(fields)
+    start = time.perf_counter()
+    try:
+        yield tags
+    except BaseException as e:
+        if _cancelled(e):
+            tags["cancelled"] = True
+            record(stage, time.perf_counter() - start, **tags)
+        else:
+            tags.setdefault("error", type(e).__name__)
+            record(stage, time.perf_counter() - start, ok=False, **tags)
+        raise
+    record(stage, time.perf_counter() - start, **tags)
+
+
+def load(path=TELEMETRY_PATH, limit=50_000):
+    """The last `limit` spans from the JSONL log and its rotated copy (every process), as a DataFrame."""
+    files = [name for name in (_rotated(path), path) if os.path.exists(name)]
+    if not files:
+        return pd.DataFrame(list(_recent))
+    lines = deque(maxlen=limit)
+    for name in files:
+        with open(name, encoding="utf-8") as f:
+            lines.extend(f)
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            # a line cut short by a crash
+            continue
+    return pd.DataFrame(records)
+
+
+def summarize(spans, by=("stage", "page", "model")):
+    """p50/p95 latency, error, fallback and cache hit rates per group of spans."""
+    if spans.empty:
+        return pd.DataFrame()
+    spans = spans.copy()
+    keys = [key for key in by if key in spans.columns]
+    for key in keys:
+        spans[key] = spans[key].fillna("-")
+    for column in ("fallback", "cache_hit"):
+        if column not in spans.columns:
+            spans[column] = pd.NA
+    grouped = spans.groupby(keys, dropna=False)
+    table = pd.DataFrame({
+        "count": grouped.size(),
+        "p50_ms": grouped["seconds"].quantile(0.5) * 1000,
+        "p95_ms": grouped["seconds"].quantile(0.95) * 1000,
+        "error_rate": 1 - grouped["ok"].mean(),
+        "fallback_rate": grouped["fallback"].apply(lambda s: s.dropna().astype(bool).mean()),
+        "cache_hit_ratio": grouped["cache_hit"].apply(lambda s: s.dropna().astype(bool).mean()),
+    })
+    for column in ("tokens_in", "tokens_out"):
+        if column in spans.columns:
+            table[column] = grouped[column].sum(min_count=1)
+    return table.round(3).sort_values("p95_ms", ascending=False)
@@ -0,0 +1,60 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from local_query import answer_locally, parse_question  # noqa: E402
+
+DF = pd.DataFrame({
+    "Roll No": [1, 2, 3, 4],
+    "Name": ["John", "Ravi", "Asha", "Meera"],
+    "Maths": [69, 46, 95, 38],
+    "Geography": [46, 70, 81, 55],
+    "English": [91, 83, 60, 72],
+    "Attendance": [73, 81, 92, 58],
+})
+
+CASES = [
+    ("How many students scored above 90 in Maths?",
+     {"op": "count", "column": "Maths", "comparator": ">", "value": 90.0}),
+    ("List students with attendance below 75%",
+     {"op": "list", "column": "Attendance", "comparator": "<", "value": 75.0}),
+    ("Which students have 60 or more in English?",
+     {"op": "list", "column": "English", "comparator": ">=", "value": 60.0}),
+    ("List the top 3 students in Maths",
+     {"op": "top_k", "column": "Maths", "k": 3, "order": "desc"}),
+    ("Show the bottom 2 students in the class",
+     {"op": "top_k", "column": "Average", "k": 2, "order": "asc"}),
+    ("Who has the lowest attendance?", {"op": "extreme", "column": "Attendance", "which": "min"}),
+    ("What is the median Geography mark?", {"op": "aggregate", "column": "Geography", "aggregate": "median"}),
+    ("What is the class average?", {"op": "aggregate", "column": "Average", "aggregate": "mean"}),
+    ("How many students are there?", {"op": "size"}),
+    # Everything below is only partly understood and must go to Gemini
+    ("How many students have attendance between 60 and 80?", None),
+    ("How many students scored above 90 in Maths and below 50 in Science?", None),
+    ("How many students scored above 90 in Maths or English?", None),
+    ("What is the average attendance of students who scored below 40 in Maths?", None),
+    ("Which subject has the highest average?", None),
+    ("What percentage of students scored above 50 in Maths?", None),
+    ("List the top 3 students in Science", None),
+    ("How many students have marks above 90 in Science?", None),
+    ("How many students have attendance data?", None),
+    ("What is the average?", None),
+    ("Who scored 90 in Maths?", None),
+    ("What is the most common attendance?", None),
+    ("How many students have the highest attendance?", None),
+    ("Who has the most attendance?", None),
+]
+
+
+@pytest.mark.parametrize("question, plan", CASES)
+def test_parse_question(question, plan):
+    assert parse_question(question, DF) == plan
+
+
+def test_answer_locally():
+    assert answer_locally("How many students scored above 90 in Maths?", DF) == "1 of 4 students have Maths mark > 90."
+    assert answer_locally("List the top 3 students in Science", DF) is None
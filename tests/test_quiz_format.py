@@ -0,0 +1,81 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from quiz_format import QuizStreamParser, parse_quiz_json, to_question  # noqa: E402
+
+OPTIONS = ["Berlin", "Madrid", "Paris", "Rome"]
+
+CASES = [
+    ({"question": "Capital of France?", "options": OPTIONS, "answer": "c"}, "c"),
+    ({"question": "Capital of France?", "options": OPTIONS, "answer": "C"}, "c"),
+    ({"question": "Capital of France?", "options": OPTIONS, "answer": "c) Paris"}, "c"),
+    ({"question": "Capital of France?", "options": OPTIONS, "answer": "Option C"}, "c"),
+    ({"question": "Capital of France?", "options": OPTIONS, "answer": "Paris"}, "c"),
+    ({"question": "Capital of France?", "options": OPTIONS, "answer": 2}, "c"),
+    ({"question": "Capital of France?", "options": ["a. Berlin", "b. Madrid", "c. Paris", "d. Rome"], "answer": "c"}, "c"),
+    ({"question": "Capital of France?", "options": {"a": "Berlin", "b": "Madrid", "c": "Paris", "d": "Rome"},
+      "answer": "c"}, "c"),
+    # A bare letter is the letter, even when an option's text is that letter
+    ({"question": "Which letter is a vowel?", "options": ["D", "A", "C", "K"], "answer": "a"}, "a"),
+]
+
+
+@pytest.mark.parametrize("item, letter", CASES)
+def test_to_question_answer(item, letter):
+    lines, reason = to_question(item, number=3)
+    assert reason is None
+    assert lines[0] == f"Q3: {item['question']}"
+    assert lines[-1] == f"Answer: {letter}"
+    assert len(lines) == 6
+
+
+@pytest.mark.parametrize("item", [
+    "not an object",
+    {"options": OPTIONS, "answer": "a"},
+    {"question": "Q?", "options": OPTIONS[:3], "answer": "a"},
+    {"question": "Q?", "options": ["x", "x", "y", "z"], "answer": "a"},
+    {"question": "Q?", "options": OPTIONS, "answer": "Lisbon"},
+])
+def test_to_question_rejects(item):
+    lines, reason = to_question(item)
+    assert lines is None and reason
+
+
+def _item(n):
+    return {"question": f"Question {n}?", "options": ["w", "x", "y", "z"], "answer": "b"}
+
+
+def test_stream_parser_emits_items_across_chunk_boundaries():
+    text = json.dumps([_item(1), _item(2), _item(3)])
+    parser = QuizStreamParser()
+    questions = []
+    for i in range(0, len(text), 7):
+        questions += [lines for lines, _ in parser.feed(text[i:i + 7])]
+    assert parser.close() == []
+    assert [q[0] for q in questions] == ["Q1: Question 1?", "Q1: Question 2?", "Q1: Question 3?"]
+    assert parser.broken == []
+
+
+def test_stream_parser_handles_wrapper_object_and_braces_in_strings():
+    item = {"question": "What does {x} mean?", "options": ["a}", "b{", "c", "d"], "answer": "a"}
+    questions, broken = parse_quiz_json(json.dumps({"questions": [item, _item(2)]}))
+    assert [q[0] for q in questions] == ["Q1: What does {x} mean?", "Q1: Question 2?"]
+    assert broken == []
+
+
+def test_stream_parser_reports_broken_and_truncated_items():
+    text = '[{"question": "Q?", "options": ["a", "b"], "answer": "a"}, ' + json.dumps(_item(2)) + ', {"question": "cut'
+    questions, broken = parse_quiz_json(text)
+    assert [q[0] for q in questions] == ["Q1: Question 2?"]
+    assert len(broken) == 2
+
+
+def test_stream_parser_falls_back_to_text_layout():
+    questions, broken = parse_quiz_json("Q1: Capital of France?\na. Berlin\nb. Madrid\nc. Paris\nd. Rome\nAnswer: c")
+    assert questions == [["Q1: Capital of France?", "a. Berlin", "b. Madrid", "c. Paris", "d. Rome", "Answer: c"]]
+    assert broken == []
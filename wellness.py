@@ -1,24 +1,27 @@
 import streamlit as st
 import time
-import google.generativeai as genai
-from langchain.vectorstores import Chroma
 from langchain.prompts import PromptTemplate
-from langchain.chains import RetrievalQA
-from langchain.embeddings import HuggingFaceEmbeddings
 import os
-from dotenv import load_dotenv
+import gemini_client
+import registry
+import telemetry
+from semantic_cache import SemanticCache
 
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+ANSWER_CACHE_THRESHOLD = float(os.getenv("COUNSELLOR_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("COUNSELLOR_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+ANSWER_CACHE_SIZE = int(os.getenv("COUNSELLOR_CACHE_SIZE", "512"))
 
-genai.configure(api_key=GEMINI_API_KEY)
 
-def counsellor():
-    persist_directory = 'wellness_cur/chroma'
+def answer_cache():
+    """Process-wide semantic cache of counsellor answers, shared by all sessions."""
+    return registry.get(
+        ("semantic_cache", "counsellor"),
+        lambda: SemanticCache(ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_SIZE)
+    )
 
-    embedding = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2", model_kwargs={"device": "cpu"})
 
-    vectordb = Chroma(persist_directory=persist_directory, embedding_function=embedding)
+def counsellor():
+    vectordb = registry.chroma()
 
     st.markdown(
         '<i><h3 style="font-family:Arial;color:#1F2839;text-align:center;'
@@ -43,9 +46,21 @@ def counsellor():
         with st.chat_message("assistant"):
             message_placeholder = st.empty()
             full_response = ""
-
-            retriever = vectordb.as_retriever()
-            docs = retriever.get_relevant_documents(prompt)
+            request_start = time.perf_counter()
+
+            # Embed once: the same vector is used for the cache and for retrieval
+            query_vector = registry.embeddings().embed_query(prompt)
+            with telemetry.span("cache.semantic") as tags:
+                cached_answer, similarity = answer_cache().lookup(query_vector)
+                tags.update(cache_hit=cached_answer is not None, similarity=round(float(similarity), 4))
+            if cached_answer is not None:
+                message_placeholder.markdown(cached_answer)
+                st.session_state.messages.append({"role": "assistant", "content": cached_answer})
+                return
+
+            with telemetry.span("retrieval.chroma", collection="wellness") as tags:
+                docs = vectordb.similarity_search_by_vector(query_vector)
+                tags["results"] = len(docs)
             context = "\n".join([doc.page_content for doc in docs])
 
             template = """Use the following pieces of context to answer the question at the end. 
@@ -66,14 +81,29 @@ Helpful Answer:"""
             )
             final_prompt = QA_CHAIN_PROMPT.format(context=context, question=prompt)
 
-            model = genai.GenerativeModel("gemini-1.5-flash")
-            response = model.generate_content(final_prompt)
-            full_response += response.text
-            message_placeholder.markdown(full_response + "▌")
-            time.sleep(0.05)
-            message_placeholder.markdown(full_response)
-
-        st.session_state.messages.append({"role": "assistant", "content": full_response})
+            if "counsellor_ttft" not in st.session_state:
+                st.session_state.counsellor_ttft = []
+
+            start = time.perf_counter()
+            completed = False
+            try:
+                for text in gemini_client.stream(final_prompt, policy="chat"):
+                    if not full_response:
+                        st.session_state.counsellor_ttft.append(time.perf_counter() - start)
+                    full_response += text
+                    message_placeholder.markdown(full_response + "▌")
+                completed = True
+                message_placeholder.markdown(full_response)
+                # A blocked or empty reply would otherwise be served to every similar question
+                if full_response.strip():
+                    answer_cache().store(query_vector, full_response, time.perf_counter() - request_start)
+            finally:
+                # Sending a new message reruns the script, which interrupts this
+                # loop mid-stream; keep whatever was already shown in the history.
+                if not completed and full_response:
+                    full_response += " …"
+                if completed or full_response:
+                    st.session_state.messages.append({"role": "assistant", "content": full_response})
 
 
 if __name__ == "__main__":